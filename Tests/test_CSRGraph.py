@@ -0,0 +1,117 @@
+import random
+from math import inf
+from unittest import TestCase
+
+from DiGraph import DiGraph
+
+
+# function for creating graph
+def createGraph(n):
+    graph = DiGraph()
+    for i in range(n):
+        graph.add_node(i)
+    return graph
+
+
+class TestCSRGraph(TestCase):
+
+    def test_from_graph(self):
+        graph = createGraph(4)
+        graph.remove_node(0)
+        graph.add_node(7)
+        graph.add_edge(1, 2, 1.5)
+        graph.add_edge(1, 7, 2)
+        graph.add_edge(3, 1, 0.5)
+        csr = graph.freeze()
+        self.assertEqual(4, csr.v_size())
+        self.assertEqual(3, csr.e_size())
+        # The dense indices follow the order of the nodes in the graph
+        self.assertListEqual([1, 2, 3, 7], csr.ids)
+        self.assertDictEqual({1: 0, 2: 1, 3: 2, 7: 3}, csr.index)
+        self.assertListEqual([0, 2, 2, 3, 3], list(csr.out_indptr))
+        self.assertListEqual([1, 3, 0], list(csr.out_indices))
+        self.assertListEqual([1.5, 2, 0.5], list(csr.out_weights))
+        self.assertListEqual([0, 1, 2, 2, 3], list(csr.in_indptr))
+        self.assertListEqual([2, 0, 0], list(csr.in_indices))
+        self.assertListEqual([0.5, 1.5, 2], list(csr.in_weights))
+
+    def test_freeze(self):
+        graph = createGraph(3)
+        graph.add_edge(0, 1, 1)
+        csr = graph.freeze()
+        # The snapshot is built again only after a change in the graph
+        self.assertIs(csr, graph.freeze())
+        graph.add_edge(0, 1, 5)
+        self.assertIs(csr, graph.freeze())
+        graph.add_edge(1, 2, 1)
+        self.assertIsNot(csr, graph.freeze())
+        self.assertEqual(1, csr.e_size())
+        self.assertEqual(2, graph.freeze().e_size())
+
+    def test_algorithms(self):
+        graph = createGraph(5)
+        graph.add_edge(0, 1, 1)
+        graph.add_edge(1, 2, 1)
+        graph.add_edge(2, 0, 1)
+        graph.add_edge(2, 3, 4)
+        graph.add_edge(0, 3, 6)
+        csr = graph.freeze()
+        dist, parents = csr.dijkstra(0)
+        self.assertDictEqual({0: 0, 1: 1, 2: 2, 3: 6}, dist)
+        self.assertListEqual([0, 1, 2], csr.path_to(parents, 2))
+        # distances to 3 over the in edges
+        dist, parents = csr.dijkstra(3, reverse=True)
+        self.assertDictEqual({3: 0, 2: 4, 0: 6, 1: 5}, dist)
+        self.assertListEqual([0, 1, 3, 2], csr.bfs(0))
+        self.assertListEqual([3, 2, 0, 1], csr.bfs(3, True))
+        self.assertListEqual([[3], [2, 1, 0], [4]], list(csr.scc()))
+        self.assertListEqual([[3]], list(csr.scc([3])))
+        self.assertEqual((5, [1, 2, 3]), csr.bidirectional_path(1, 3))
+        self.assertEqual((0, [4]), csr.bidirectional_path(4, 4))
+        self.assertEqual((inf, []), csr.bidirectional_path(3, 0))
+
+    def test_bfs_levels(self):
+        graph = createGraph(6)
+        for id1, id2 in [(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (4, 0)]:
+            graph.add_edge(id1, id2, 1)
+        csr = graph.freeze()
+        self.assertListEqual([0, 1, 1, 2, 3, -1], list(csr.bfs_levels([0])))
+        self.assertListEqual([1, 2, 2, 3, 0, -1], list(csr.bfs_levels([4])))
+        self.assertListEqual([3, 2, 2, 1, 0, -1], list(csr.bfs_levels([4], True)))
+        self.assertListEqual([0, 1, 1, 2, 3, 0], list(csr.bfs_levels([0, 5])))
+        # A dense graph, the levels run bottom-up, and the same levels without NumPy
+        rand = random.Random(2)
+        graph = createGraph(60)
+        graph.add_edges_from((rand.randrange(60), rand.randrange(60), 1) for _ in range(900))
+        csr = graph.freeze()
+        for reverse in (False, True):
+            for src in range(0, 60, 7):
+                levels = list(csr.bfs_levels([src], reverse))
+                self.assertListEqual(list(csr.bfs_levels_python([src], reverse)), levels)
+                self.assertListEqual(sorted(csr.bfs(src, reverse)), [i for i in range(60) if levels[i] >= 0])
+
+    def test_astar_path(self):
+        graph = DiGraph()
+        for i, pos in enumerate([(0, 0, 0), (1, 0, 0), (2, 0, 0), (1, 1, 0)]):
+            graph.add_node(i, pos)
+        graph.add_edge(0, 1, 2)
+        graph.add_edge(1, 2, 2)
+        graph.add_edge(0, 3, 3)
+        graph.add_edge(3, 2, 3)
+        csr = graph.freeze()
+        # The smallest ratio between a weight and the distance is 3 / sqrt(2)
+        self.assertAlmostEqual(2, csr.heuristic_scale())
+        self.assertEqual((4, [0, 1, 2]), csr.astar_path(0, 2))
+        self.assertEqual((inf, []), csr.astar_path(2, 0))
+
+        # A weight smaller than the distance lowers the scale
+        graph.add_edge(2, 0, 1)
+        self.assertAlmostEqual(0.5, graph.freeze().heuristic_scale())
+        self.assertEqual((3, [1, 2, 0]), graph.freeze().astar_path(1, 0))
+
+        # The heuristic can not be used without positions or with an edge of weight 0
+        graph.add_edge(1, 3, 0)
+        self.assertEqual(0, graph.freeze().heuristic_scale())
+        graph.add_node(4)
+        self.assertEqual(0, graph.freeze().heuristic_scale())
+        self.assertIsNone(createGraph(3).freeze().pos)
@@ -1,3 +1,4 @@
+import gc
 from unittest import TestCase
 
 from DiGraph import DiGraph
@@ -174,3 +175,260 @@ class TestDiGraph(TestCase):
         self.assertIsNone(graph.all_out_edges_of_node(4).get(5))
         self.assertFalse(graph.remove_edge(7, 8))
         self.assertNotEqual(3, graph.outEdges.get(1).get(2))
+
+    def test_add_nodes_from(self):
+        graph = createGraph(2)
+        rejected = graph.add_nodes_from([1, 2, (3, (1.0, 2.0, 0.0)), 2])
+        self.assertListEqual([(0, "duplicate"), (3, "duplicate")], rejected)
+        self.assertEqual(4, graph.v_size())
+        self.assertEqual((1.0, 2.0, 0.0), graph.get_all_v().get(3).getPos())
+        self.assertEqual({}, graph.all_out_edges_of_node(3))
+        # The MC is increased once for all the nodes
+        self.assertEqual(3, graph.get_mc())
+        graph.add_nodes_from([0, 1])
+        self.assertEqual(3, graph.get_mc())
+
+    def test_add_edges_from(self):
+        graph = createGraph(5)
+        rows = [(0, 1, 1.5), (1, 1, 2), (1, 2, -1), (2, 9, 1), (0, 1, 3), (1, 0, 0), (3, 4, 2)]
+        rejected = graph.add_edges_from(rows)
+        self.assertListEqual([(1, "self loop"), (2, "negative weight"), (3, "missing node"), (4, "duplicate")],
+                             rejected)
+        self.assertEqual(3, graph.e_size())
+        self.assertEqual(6, graph.get_mc())
+        self.assertDictEqual({1: 1.5}, graph.all_out_edges_of_node(0))
+        self.assertDictEqual({0: 1.5}, graph.all_in_edges_of_node(1))
+        self.assertDictEqual({3: 2}, graph.all_in_edges_of_node(4))
+        # The same graph as adding the edges one by one
+        other = createGraph(5)
+        for row in rows:
+            other.add_edge(*row)
+        self.assertEqual(other, graph)
+        self.assertListEqual([(0, "duplicate")], graph.add_edges_from([(3, 4, 1)]))
+        self.assertEqual(6, graph.get_mc())
+
+    def test_listener(self):
+        changes = []
+
+        class Listener:
+            def node_added(self, node_id):
+                changes.append(("node_added", node_id))
+
+            def node_removed(self, node_id):
+                changes.append(("node_removed", node_id))
+
+            def edge_added(self, id1, id2, weight):
+                changes.append(("edge_added", id1, id2, weight))
+
+            def edge_removed(self, id1, id2):
+                changes.append(("edge_removed", id1, id2))
+
+        graph = createGraph(2)
+        listener = Listener()
+        graph.add_listener(listener)
+        graph.add_node(2)
+        graph.add_edge(0, 1, 1.5)
+        graph.add_edge(0, 1, 2)
+        graph.add_edges_from([(1, 2, 1), (1, 1, 1)])
+        graph.remove_node(1)
+        graph.remove_listener(listener)
+        graph.add_node(1)
+        self.assertListEqual([("node_added", 2), ("edge_added", 0, 1, 1.5), ("edge_added", 1, 2, 1),
+                              ("edge_removed", 1, 2), ("edge_removed", 0, 1), ("node_removed", 1)], changes)
+
+    def test_remove_nodes_from(self):
+        graph = createGraph(6)
+        graph.add_edges_from([(0, 1, 1), (1, 2, 1), (2, 0, 1), (3, 4, 1), (4, 3, 1), (0, 5, 2), (5, 3, 1)])
+        components = graph.strong_components()
+        self.assertEqual(3, len(components.components()))
+        mc = graph.get_mc()
+        rejected = graph.remove_nodes_from([1, 7, 5, 1])
+        self.assertListEqual([(1, "missing node"), (3, "missing node")], rejected)
+        self.assertEqual(mc + 1, graph.get_mc())
+        self.assertEqual(4, graph.v_size())
+        self.assertEqual(3, graph.e_size())
+        self.assertDictEqual({}, graph.all_out_edges_of_node(0))
+        self.assertDictEqual({0: 1}, graph.all_out_edges_of_node(2))
+        self.assertDictEqual({4: 1}, graph.all_in_edges_of_node(3))
+        # The listeners are told about each removed node
+        self.assertListEqual([[0], [2], [3, 4]], sorted(sorted(c) for c in components.components()))
+        # The same graph as removing the nodes one by one
+        other = createGraph(6)
+        other.add_edges_from([(0, 1, 1), (1, 2, 1), (2, 0, 1), (3, 4, 1), (4, 3, 1), (0, 5, 2), (5, 3, 1)])
+        self.assertTrue(other.remove_node(1))
+        self.assertTrue(other.remove_node(5))
+        self.assertEqual(other, graph)
+        self.assertEqual(mc + 2, other.get_mc())
+        self.assertListEqual([], graph.remove_nodes_from([]))
+        self.assertEqual(mc + 1, graph.get_mc())
+
+    def test_subgraph(self):
+        graph = createGraph(0)
+        graph.add_nodes_from([(i, (i, 0, 0)) for i in range(6)])
+        graph.add_edges_from([(0, 1, 1), (1, 2, 1), (2, 0, 1), (3, 4, 1), (4, 3, 1), (0, 5, 2), (5, 3, 1)])
+        graph.get_all_v()[4].setInfo("four")
+        sub = graph.subgraph({4, 0, 3, 5, 9})
+        self.assertListEqual([0, 3, 4, 5], list(sub.get_all_v()))
+        self.assertEqual(4, sub.e_size())
+        self.assertDictEqual({5: 2}, sub.all_out_edges_of_node(0))
+        self.assertDictEqual({4: 1, 5: 1}, sub.all_in_edges_of_node(3))
+        self.assertEqual((4, 0, 0), sub.get_all_v()[4].getPos())
+        self.assertEqual("four", sub.get_all_v()[4].getInfo())
+        # The same graph as removing the other nodes
+        graph.remove_nodes_from([1, 2])
+        self.assertEqual(graph, sub)
+        compact = DiGraph(compact=True)
+        compact.add_nodes_from(range(3))
+        compact.add_edges_from([(0, 1, 1), (1, 2, 1)])
+        self.assertTrue(compact.subgraph([1, 2]).compact)
+        self.assertDictEqual({2: 1}, compact.subgraph([1, 2]).all_out_edges_of_node(1))
+
+    def test_fingerprint(self):
+        graph = createGraph(0)
+        self.assertEqual(0, graph.fingerprint())
+        graph.add_nodes_from(range(4))
+        graph.add_edges_from([(0, 1, 1), (1, 2, 2.5), (2, 3, 1)])
+        # The same content added in another order
+        other = createGraph(0)
+        for i in (3, 1, 2, 0):
+            other.add_node(i)
+        for id1, id2, weight in [(2, 3, 1.0), (0, 1, 1), (1, 2, 2.5)]:
+            other.add_edge(id1, id2, weight)
+        self.assertEqual(graph.fingerprint(), other.fingerprint())
+        self.assertEqual(graph, other)
+        # The same sizes, a different weight or a different edge
+        other.remove_edge(1, 2)
+        other.add_edge(1, 2, 3)
+        self.assertNotEqual(graph.fingerprint(), other.fingerprint())
+        self.assertNotEqual(graph, other)
+        other.remove_edge(1, 2)
+        other.add_edge(2, 1, 2.5)
+        self.assertNotEqual(graph.fingerprint(), other.fingerprint())
+        # Removing and adding back gives back the fingerprint
+        fingerprint = graph.fingerprint()
+        graph.remove_node(1)
+        self.assertNotEqual(fingerprint, graph.fingerprint())
+        graph.add_node(1)
+        graph.add_edges_from([(0, 1, 1), (1, 2, 2.5)])
+        self.assertEqual(fingerprint, graph.fingerprint())
+        self.assertEqual(graph.fingerprint(), graph.subgraph(range(4)).fingerprint())
+        other = createGraph(0)
+        other.add_nodes_from([3, 0])
+        self.assertEqual(other.fingerprint(), graph.subgraph([0, 3]).fingerprint())
+
+    def test_freeze_same_content(self):
+        graph = createGraph(5)
+        graph.add_edges_from([(0, 1, 1), (1, 2, 2), (2, 3, 1)])
+        csr = graph.freeze()
+        mc = csr.mc
+        # An edge added and removed: the same content in the same order, the new snapshot shares the arrays
+        graph.add_edge(3, 4, 1)
+        graph.remove_edge(3, 4)
+        renewed = graph.freeze()
+        self.assertIsNot(csr, renewed)
+        self.assertTrue(renewed.same_content(csr))
+        self.assertIs(csr.out_indptr, renewed.out_indptr)
+        self.assertEqual(graph.get_mc(), renewed.mc)
+        # The old snapshot is not changed, a GraphSnapshot may still use it
+        self.assertEqual(mc, csr.mc)
+        graph.add_edge(3, 4, 1)
+        self.assertFalse(graph.freeze().same_content(csr))
+        # A node removed and added back is last in the order of the nodes, a new snapshot is built
+        csr = graph.freeze()
+        graph.remove_node(0)
+        graph.add_node(0)
+        graph.add_edge(0, 1, 1)
+        self.assertEqual(csr.fingerprint, graph.fingerprint())
+        self.assertIsNot(csr, graph.freeze())
+        self.assertListEqual([1, 2, 3, 4, 0], graph.freeze().ids)
+
+    def test_freeze_new_positions(self):
+        graph = DiGraph()
+        graph.add_nodes_from((i, (i, 0, 0)) for i in range(4))
+        graph.add_edges_from([(0, 1, 1), (1, 2, 2), (2, 3, 1)])
+        csr = graph.freeze()
+        # The same fingerprint and order, but node 3 has a new position
+        graph.remove_node(3)
+        graph.add_node(3, (100, 5, 7))
+        graph.add_edge(2, 3, 1)
+        self.assertEqual(csr.fingerprint, graph.fingerprint())
+        self.assertFalse(graph.freeze().same_content(csr))
+        self.assertListEqual([100, 5, 7], list(graph.freeze().pos[9:12]))
+
+    def test_snapshot(self):
+        graph = createGraph(5)
+        graph.add_edges_from([(0, 1, 1), (1, 2, 2), (2, 3, 1), (3, 0, 4)])
+        csr = graph.freeze()
+        snapshot = graph.snapshot()
+        self.assertIs(csr, snapshot.freeze())
+        self.assertIs(snapshot, snapshot.snapshot())
+        mc = graph.get_mc()
+        fingerprint = graph.fingerprint()
+        graph.remove_edge(0, 1)
+        graph.add_edge(1, 4, 3)
+        graph.remove_node(3)
+        graph.add_node(7)
+        graph.add_edges_from([(7, 2, 1)])
+        # The snapshot keeps its version, only the rows the changes touched were copied
+        self.assertEqual(mc, snapshot.get_mc())
+        self.assertEqual(fingerprint, snapshot.fingerprint())
+        self.assertEqual(4, snapshot.e_size())
+        self.assertDictEqual({1: 1}, snapshot.all_out_edges_of_node(0))
+        self.assertDictEqual({2: 2}, snapshot.all_out_edges_of_node(1))
+        self.assertDictEqual({0: 4}, snapshot.all_out_edges_of_node(3))
+        self.assertNotIn(7, snapshot.get_all_v())
+        self.assertIs(snapshot.all_out_edges_of_node(4), graph.all_out_edges_of_node(4))
+        self.assertIsNot(snapshot.all_out_edges_of_node(1), graph.all_out_edges_of_node(1))
+        self.assertDictEqual({2: 2, 4: 3}, graph.all_out_edges_of_node(1))
+        self.assertRaises(TypeError, snapshot.add_edge, 0, 2, 1)
+        self.assertRaises(TypeError, snapshot.remove_node, 0)
+        # A second snapshot and changes after it, the first snapshot still keeps its version
+        second = graph.snapshot()
+        graph.remove_edge(1, 2)
+        self.assertDictEqual({2: 2, 4: 3}, second.all_out_edges_of_node(1))
+        self.assertDictEqual({2: 2}, snapshot.all_out_edges_of_node(1))
+        self.assertEqual(fingerprint, snapshot.fingerprint())
+        self.assertEqual(fingerprint, snapshot.freeze().fingerprint)
+
+    def test_snapshot_dropped(self):
+        graph = createGraph(3)
+        graph.add_edge(0, 1, 1)
+        snapshot = graph.snapshot()
+        second = graph.snapshot()
+        graph.add_edge(1, 2, 1)
+        self.assertIn(0, graph._sharedOut)
+        del snapshot
+        gc.collect()
+        # A snapshot is still alive, the rows it shares are still copied before they are changed
+        self.assertIn(0, graph._sharedOut)
+        graph.remove_edge(0, 1)
+        self.assertDictEqual({1: 1}, second.all_out_edges_of_node(0))
+        del second
+        gc.collect()
+        # No snapshot is alive, the graph keeps nothing for them
+        self.assertDictEqual({}, graph._sharedOut)
+        self.assertDictEqual({}, graph._sharedIn)
+        graph.snapshot()
+        gc.collect()
+        self.assertFalse(graph._shared)
+
+    def test_snapshot_compact(self):
+        graph = DiGraph(compact=True)
+        graph.add_nodes_from([(0, (1, 1, 0)), (1, (2, 2, 0))])
+        graph.add_edge(0, 1, 1)
+        snapshot = graph.snapshot()
+        graph.remove_node(0)
+        graph.add_node(2)
+        graph.get_all_v()[1].setPos((5, 5, 0))
+        self.assertListEqual([0, 1], list(snapshot.get_all_v()))
+        self.assertEqual((2, 2, 0), snapshot.get_all_v()[1].getPos())
+        self.assertDictEqual({1: 1}, snapshot.all_out_edges_of_node(0))
+        self.assertListEqual([1, 2], list(graph.get_all_v()))
+        # A position set before the first change after the snapshot is not seen by it either
+        snapshot = graph.snapshot()
+        graph.get_all_v()[1].setPos((6, 6, 0))
+        graph.get_all_v()[1].setTag(3)
+        self.assertEqual((5, 5, 0), snapshot.get_all_v()[1].getPos())
+        self.assertEqual(0, snapshot.get_all_v()[1].getTag())
+        graph.add_node(3)
+        self.assertListEqual([1, 2], list(snapshot.get_all_v()))
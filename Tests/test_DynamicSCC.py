@@ -0,0 +1,144 @@
+import random
+import sys
+from threading import Barrier, Thread
+from unittest import TestCase
+
+from DiGraph import DiGraph
+from GraphAlgo import GraphAlgo
+
+
+# function for creating graph
+def createGraph(n):
+    graph = DiGraph()
+    for i in range(n):
+        graph.add_node(i)
+    return graph
+
+
+# The components found by a full scan of the graph
+def scanComponents(graph):
+    csr = graph.freeze()
+    return sorted(sorted(csr.ids[i] for i in component) for component in csr.scc())
+
+
+class TestDynamicSCC(TestCase):
+
+    def test_merge_and_split(self):
+        graph = createGraph(6)
+        for i in range(4):
+            graph.add_edge(i, i + 1, 1)
+        components = graph.strong_components()
+        self.assertEqual(6, len(components.components()))
+        # The edge closes the cycle 1 -> 2 -> 3 -> 1
+        graph.add_edge(3, 1, 1)
+        self.assertSetEqual({1, 2, 3}, components.component(2))
+        self.assertSetEqual({0}, components.component(0))
+        # and this one the cycle 0 -> 1 -> 2 -> 3 -> 4 -> 0
+        graph.add_edge(4, 0, 1)
+        self.assertSetEqual({0, 1, 2, 3, 4}, components.component(4))
+        # There is another path from 3 to 1, the component is not split
+        graph.remove_edge(3, 1)
+        self.assertSetEqual({0, 1, 2, 3, 4}, components.component(4))
+        # The only path from 2 to 3
+        graph.remove_edge(2, 3)
+        self.assertSetEqual({3}, components.component(3))
+        self.assertEqual(6, len(components.components()))
+        graph.add_edge(2, 3, 1)
+        graph.remove_node(0)
+        self.assertListEqual([[1], [2], [3], [4], [5]], sorted(sorted(c) for c in components.components()))
+        self.assertIsNone(components.component(0))
+        graph.add_node(0)
+        graph.add_edges_from([(4, 0, 1), (0, 1, 1), (5, 0, 1)])
+        self.assertSetEqual({0, 1, 2, 3, 4}, components.component(1))
+        self.assertIs(components, graph.strong_components())
+
+    def test_random_changes(self):
+        rand = random.Random(3)
+        for _ in range(50):
+            n = rand.randint(1, 20)
+            graph = createGraph(n)
+            graph.add_edges_from((rand.randrange(n), rand.randrange(n), 1) for _ in range(rand.randint(0, 30)))
+            components = graph.strong_components()
+            nextKey = n
+            for _ in range(100):
+                keys = list(graph.get_all_v())
+                op = rand.random()
+                if op < 0.5 and keys:
+                    graph.add_edge(rand.choice(keys), rand.choice(keys), 1)
+                elif op < 0.8 and keys:
+                    src = rand.choice(keys)
+                    if graph.all_out_edges_of_node(src):
+                        graph.remove_edge(src, rand.choice(list(graph.all_out_edges_of_node(src))))
+                elif op < 0.9:
+                    graph.add_node(nextKey)
+                    nextKey += 1
+                elif keys:
+                    graph.remove_node(rand.choice(keys))
+                if rand.random() < 0.3:
+                    self.assertListEqual(scanComponents(graph),
+                                         sorted(sorted(c) for c in components.components()))
+            # The components are in a topological order of the condensation
+            components.split()
+            for c, edges in components.out.items():
+                for other in edges:
+                    self.assertLess(components.ord[c], components.ord[other])
+
+    def test_threads_create(self):
+        # Threads that ask for the components of a graph at once get the same components, told about the changes once
+        graph = createGraph(2000)
+        graph.add_edges_from((i, (i + 1) % 2000, 1) for i in range(2000))
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        barrier = Barrier(8)
+        results = [None] * 8
+
+        def create(t):
+            barrier.wait()
+            results[t] = graph.strong_components()
+
+        threads = [Thread(target=create, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertListEqual([results[0]], graph._listeners)
+        graph.remove_edge(1999, 0)
+        self.assertEqual(1, len(results[0].component(0)))
+
+    def test_threads_after_remove(self):
+        # A ring of rings: removing an edge of the outer ring splits the big component into the small rings
+        rings = 200
+        graph = createGraph(rings * 5)
+        for r in range(rings):
+            graph.add_edges_from((r * 5 + i, r * 5 + (i + 1) % 5, 1) for i in range(5))
+            graph.add_edge(r * 5, (r + 1) % rings * 5, 1)
+        graphAlgo = GraphAlgo(graph)
+        # Switch between the threads often, so they run inside each other's calls
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, interval)
+        for _ in range(5):
+            self.assertEqual(rings * 5, len(graphAlgo.connected_component(0)))
+            graph.remove_edge((rings - 1) * 5, 0)
+            barrier = Barrier(4)
+            results = [None] * 4
+            errors = []
+
+            def read(t):
+                barrier.wait()
+                try:
+                    results[t] = [len(graphAlgo.connected_component(key)) for key in range(0, rings * 5, 7)]
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [Thread(target=read, args=(t,)) for t in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertListEqual([], errors)
+            for result in results:
+                self.assertListEqual([5] * len(result), result)
+            graph.add_edge((rings - 1) * 5, 0, 1)
@@ -1,7 +1,14 @@
 
+import importlib.util
+import math
+import random
+import os
+import tempfile
+from threading import Thread
 from unittest import TestCase
 from DiGraph import DiGraph
 from GraphAlgo import GraphAlgo
+from ReachabilityIndex import ReachabilityIndex
 
 
 # function for creating graph
@@ -194,4 +201,420 @@ class TestGraphAlgo(TestCase):
         graph.add_edge(4, 0, 0.5)
         self.assertEqual((7.5, [2, 3, 4, 0]), graphAlgo.shortest_path(2, 0))
 
-
+    def test_shortest_paths(self):
+        graph = createGraph(6)
+        graphAlgo = GraphAlgo(graph)
+        # two paths with the same weight from 0 to 3
+        graph.add_edge(0, 1, 1)
+        graph.add_edge(0, 2, 1)
+        graph.add_edge(1, 3, 1)
+        graph.add_edge(2, 3, 1)
+        graph.add_edge(3, 4, 2)
+        dist, parents = graphAlgo.shortest_paths(0)
+        self.assertDictEqual({0: 0, 1: 1, 2: 1, 3: 2, 4: 4}, dist)
+        self.assertEqual(3, parents[4])
+        self.assertDictEqual(parents, graphAlgo.Dijkstra(0))
+
+        # the scan stops when the target is settled
+        dist, parents = graphAlgo.shortest_paths(0, 3)
+        self.assertEqual(2, dist[3])
+        self.assertNotIn(4, dist)
+        self.assertEqual((4, [0, 1, 3, 4]), graphAlgo.shortest_path(0, 4))
+        self.assertEqual((float('inf'), []), graphAlgo.shortest_path(0, 5))
+
+    def test_connected_components_data(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/A5"))
+        graphAlgo.get_graph().remove_edge(13, 14)
+        self.assertListEqual(list(range(14)), graphAlgo.connected_component(0))
+        self.assertListEqual([list(range(14)), list(range(14, 48))], graphAlgo.connected_components())
+
+        # A long chain closed into one cycle, deeper than the recursion limit
+        graph = createGraph(5000)
+        for i in range(4999):
+            graph.add_edge(i, i + 1, 1)
+        graphAlgo = GraphAlgo(graph)
+        self.assertEqual(5000, len(graphAlgo.connected_components()))
+        graph.add_edge(4999, 0, 1)
+        self.assertEqual(1, len(graphAlgo.connected_components()))
+        self.assertEqual(5000, len(graphAlgo.connected_component(2500)))
+
+    def test_queries_do_not_change_the_graph(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/G_100_800_1.json"))
+        nodes = graphAlgo.get_graph().get_all_v()
+        graphAlgo.shortest_path(0, 50)
+        graphAlgo.connected_components()
+        graphAlgo.BFS(3, False)
+        for node in nodes.values():
+            self.assertEqual(0, node.getTag())
+            self.assertEqual(" ", node.getInfo())
+            self.assertEqual(0, node.getWeight())
+
+        # The same queries from a number of threads give the same results
+        expected = [graphAlgo.shortest_path(i, 99 - i) for i in range(100)]
+        results = [None] * 8
+
+        def run(t):
+            results[t] = [graphAlgo.shortest_path(i, 99 - i) for i in range(100)]
+
+        threads = [Thread(target=run, args=(t,)) for t in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for result in results:
+            self.assertListEqual(expected, result)
+
+    def test_save_and_load_binary(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/A5"))
+        graph = graphAlgo.get_graph()
+        graph.add_node(100)
+        self.assertTrue(graphAlgo.save_binary("graph_test_binary"))
+        loaded = GraphAlgo(DiGraph())
+        self.assertTrue(loaded.load_binary("graph_test_binary"))
+        self.assertEqual(graph, loaded.get_graph())
+        self.assertEqual(graph.get_all_v().get(7).getPos(), loaded.get_graph().get_all_v().get(7).getPos())
+        self.assertIsNone(loaded.get_graph().get_all_v().get(100).getPos())
+        # The mapped arrays are the snapshot of the loaded graph
+        csr = loaded.get_graph().freeze()
+        self.assertIsInstance(csr.out_indices, memoryview)
+        self.assertListEqual(list(graph.freeze().out_weights), list(csr.out_weights))
+        self.assertEqual(graphAlgo.shortest_path(20, 2), loaded.shortest_path(20, 2))
+        self.assertEqual(graphAlgo.connected_components(), loaded.connected_components())
+        # A position set on a node does not change the MC, it is saved too; a position of 2 values stays so
+        graph.freeze()
+        graph.get_all_v().get(7).setPos((1, 2, 3))
+        graph.get_all_v().get(100).setPos((4, 5))
+        self.assertTrue(graphAlgo.save_binary("graph_test_binary"))
+        self.assertTrue(loaded.load_binary("graph_test_binary"))
+        self.assertEqual((1, 2, 3), loaded.get_graph().get_all_v().get(7).getPos())
+        self.assertEqual((4, 5), loaded.get_graph().get_all_v().get(100).getPos())
+
+        # empty graph and a file that is not in the binary format
+        self.assertTrue(GraphAlgo(DiGraph()).save_binary("graph_test_binary"))
+        self.assertTrue(loaded.load_binary("graph_test_binary"))
+        self.assertEqual(0, loaded.get_graph().v_size())
+        self.assertFalse(loaded.load_binary("../data/A5"))
+        self.assertFalse(loaded.load_binary("g"))
+
+    def test_load_binary_read_only(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/A5"))
+        graph = graphAlgo.get_graph()
+        graph.add_node(100)
+        self.assertTrue(graphAlgo.save_binary("graph_test_binary"))
+        mapped = GraphAlgo(DiGraph())
+        self.assertTrue(mapped.load_binary("graph_test_binary", read_only=True))
+        opened = mapped.get_graph()
+        self.assertEqual(graph.v_size(), opened.v_size())
+        self.assertEqual(graph.e_size(), opened.e_size())
+        self.assertEqual(graph.get_all_v().get(7).getPos(), opened.get_all_v().get(7).getPos())
+        self.assertIsNone(opened.get_all_v().get(100).getPos())
+        # The queries on the CSR snapshot build no dictionaries of the edges
+        self.assertEqual(graphAlgo.shortest_path(20, 2), mapped.shortest_path(20, 2))
+        self.assertEqual(graphAlgo.BFS(0, True), mapped.BFS(0, True))
+        self.assertNotIn("outEdges", vars(opened))
+        self.assertIsInstance(opened.freeze().out_indices, memoryview)
+        # The dictionaries and the fingerprint are built on their first use
+        self.assertDictEqual(graph.all_out_edges_of_node(3), opened.all_out_edges_of_node(3))
+        self.assertDictEqual(graph.all_in_edges_of_node(3), opened.all_in_edges_of_node(3))
+        self.assertEqual(graph.fingerprint(), opened.fingerprint())
+        self.assertEqual(graph, opened)
+        self.assertEqual(graphAlgo.connected_components(), mapped.connected_components())
+        self.assertRaises(TypeError, opened.add_node, 101)
+        self.assertRaises(TypeError, opened.remove_edge, 13, 14)
+        self.assertFalse(mapped.load_binary("../data/A5", read_only=True))
+
+    def test_shortest_path_lengths(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/G_10_80_1.json"))
+        graph = graphAlgo.get_graph()
+        graph.add_node(10)
+        keys = list(graph.get_all_v().keys())
+        expected = [[graphAlgo.shortest_path(i, j)[0] for j in keys] for i in keys]
+        for workers in (1, 2):
+            matrix = graphAlgo.all_pairs_shortest_path(workers)
+            self.assertEqual(len(keys), len(matrix))
+            for i in range(len(keys)):
+                self.assertListEqual(expected[i], list(matrix[i]))
+        # chosen sources and targets, in their order
+        rows = list(graphAlgo.shortest_path_lengths([3, 20, 1], [1, 10, 3], workers=2, chunk_size=1))
+        self.assertListEqual([3, 20, 1], [key for key, row in rows])
+        self.assertListEqual([expected[3][1], float('inf'), 0], list(rows[0][1]))
+        self.assertListEqual([float('inf')] * 3, list(rows[1][1]))
+        self.assertListEqual([0, float('inf'), expected[1][3]], list(rows[2][1]))
+
+    def test_cache(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/G_100_800_1.json"))
+        expected = [graphAlgo.shortest_path(i % 10, i) for i in range(100)]
+        cache = graphAlgo.enable_cache(max_entries=4)
+        self.assertListEqual(expected, [graphAlgo.shortest_path(i % 10, i) for i in range(100)])
+        # 10 src nodes with room for only 4 trees, a path from a node to itself does not use the cache
+        self.assertEqual(90, cache.stats()["misses"])
+        self.assertEqual(86, cache.stats()["evictions"])
+        self.assertEqual(4, cache.stats()["entries"])
+        # The tree of 9 is one of the last 4
+        self.assertListEqual(expected[19::10], [graphAlgo.shortest_path(9, i) for i in range(19, 100, 10)])
+        self.assertEqual(9, cache.stats()["hits"])
+
+        # A change in the graph drops the trees
+        graph = graphAlgo.get_graph()
+        path = graphAlgo.shortest_path(0, 50)[1]
+        graph.remove_edge(path[0], path[1])
+        self.assertNotEqual(path, graphAlgo.shortest_path(0, 50)[1])
+        self.assertEqual(1, cache.stats()["entries"])
+
+        # A bound on the size of the trees
+        cache = graphAlgo.enable_cache(max_bytes=1)
+        result = graphAlgo.shortest_path(0, 50)
+        self.assertEqual(0, cache.stats()["entries"])
+        self.assertEqual(0, cache.stats()["bytes"])
+        graphAlgo.disable_cache()
+        self.assertEqual(result, graphAlgo.shortest_path(0, 50))
+
+    def test_shortest_path_methods(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/A5"))
+        for id1 in range(0, 48, 5):
+            for id2 in range(48):
+                dist, path = graphAlgo.shortest_path(id1, id2, "dijkstra")
+                for method in ("bidirectional", "astar"):
+                    other_dist, other_path = graphAlgo.shortest_path(id1, id2, method)
+                    self.assertAlmostEqual(dist, other_dist)
+                    self.assertEqual(path[:1], other_path[:1])
+                    self.assertEqual(path[-1:], other_path[-1:])
+        graphAlgo.get_graph().remove_edge(13, 14)
+        self.assertEqual((float('inf'), []), graphAlgo.shortest_path(2, 20, "bidirectional"))
+        self.assertEqual((float('inf'), []), graphAlgo.shortest_path(2, 20, "astar"))
+        # A* without positions runs Dijkstra
+        graph = createGraph(3)
+        graph.add_edge(0, 1, 1)
+        graph.add_edge(1, 2, 1)
+        self.assertEqual((2, [0, 1, 2]), GraphAlgo(graph).shortest_path(0, 2, "astar"))
+        with self.assertRaises(ValueError):
+            graphAlgo.shortest_path(1, 2, "fastest")
+
+    def test_landmark_index(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/G_100_800_1.json"))
+        self.assertIsNone(graphAlgo.landmark_index())
+        for strategy in ("farthest", "degree"):
+            index = graphAlgo.build_landmark_index(4, strategy)
+            self.assertEqual(4, len(set(index.landmarks)))
+            self.assertIs(index, graphAlgo.landmark_index())
+            for id1 in range(0, 100, 7):
+                for id2 in range(0, 100, 3):
+                    dist, path = graphAlgo.shortest_path(id1, id2, "dijkstra")
+                    other_dist, other_path = graphAlgo.shortest_path(id1, id2)
+                    self.assertAlmostEqual(dist, other_dist)
+                    self.assertEqual(path[:1], other_path[:1])
+                    self.assertEqual(path[-1:], other_path[-1:])
+        with self.assertRaises(ValueError):
+            graphAlgo.build_landmark_index(4, "random")
+
+        # The index is saved and loaded for the same graph only
+        self.assertTrue(graphAlgo.save_landmark_index("graph_test_landmarks"))
+        loaded = GraphAlgo(DiGraph())
+        self.assertTrue(loaded.load_from_json("../data/G_100_800_1.json"))
+        self.assertTrue(loaded.load_landmark_index("graph_test_landmarks"))
+        self.assertListEqual(graphAlgo.landmark_index().landmarks, loaded.landmark_index().landmarks)
+        self.assertEqual(graphAlgo.shortest_path(5, 60), loaded.shortest_path(5, 60, "alt"))
+        loaded.get_graph().remove_edge(*next((0, dest) for dest in loaded.get_graph().all_out_edges_of_node(0)))
+        # A changed graph has no index, and ALT runs Dijkstra
+        self.assertIsNone(loaded.landmark_index())
+        self.assertEqual(loaded.shortest_path(5, 60, "dijkstra"), loaded.shortest_path(5, 60, "alt"))
+        self.assertFalse(loaded.load_landmark_index("graph_test_landmarks"))
+        self.assertFalse(loaded.load_landmark_index("../data/A5"))
+        self.assertFalse(loaded.save_landmark_index("graph_test_landmarks"))
+
+    def test_contraction_hierarchy(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/G_100_800_1.json"))
+        graph = graphAlgo.get_graph()
+        self.assertIsNone(graphAlgo.contraction_hierarchy())
+        hierarchy = graphAlgo.build_contraction_hierarchy()
+        self.assertIs(hierarchy, graphAlgo.contraction_hierarchy())
+        self.assertListEqual(list(range(100)), sorted(hierarchy.rank))
+        for id1 in range(0, 100, 7):
+            for id2 in range(0, 100, 3):
+                dist, path = graphAlgo.shortest_path(id1, id2, "dijkstra")
+                other_dist, other_path = graphAlgo.shortest_path(id1, id2)
+                self.assertAlmostEqual(dist, other_dist)
+                # The shortcuts are unpacked to the edges of the graph
+                self.assertEqual(path[:1], other_path[:1])
+                self.assertEqual(path[-1:], other_path[-1:])
+                self.assertAlmostEqual(dist, sum(graph.all_out_edges_of_node(u)[v]
+                                                 for u, v in zip(other_path, other_path[1:])))
+        stats = hierarchy.stats()
+        self.assertEqual(hierarchy.shortcuts(), stats["shortcuts"])
+        # id1 == id2 is answered without the hierarchy
+        self.assertEqual(15 * 34 - 5, stats["queries"])
+        self.assertGreater(stats["preprocess_seconds"], 0)
+
+        # A changed graph has no hierarchy, and "ch" runs Dijkstra
+        graph.add_node(100)
+        graph.add_edge(0, 100, 1)
+        self.assertIsNone(graphAlgo.contraction_hierarchy())
+        self.assertEqual((1, [0, 100]), graphAlgo.shortest_path(0, 100, "ch"))
+        graphAlgo.build_contraction_hierarchy()
+        self.assertEqual((1, [0, 100]), graphAlgo.shortest_path(0, 100))
+        self.assertEqual((float('inf'), []), graphAlgo.shortest_path(100, 0))
+
+    def test_reachable(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/A5"))
+        graph = graphAlgo.get_graph()
+        graph.remove_edge(13, 14)
+        graph.add_node(100)
+        graph.add_edge(100, 0, 1)
+        index = graphAlgo.reachability_index()
+        self.assertIs(index, graphAlgo.reachability_index())
+        # The same DAG, with random DFS orders instead of the labels
+        orders = ReachabilityIndex.build(graph.freeze(), 0)
+        self.assertIsNone(orders.intervals())
+        csr = graph.freeze()
+        for id1 in graph.get_all_v():
+            reached = {csr.ids[i] for i in csr.bfs(csr.index[id1], False)}
+            for id2 in graph.get_all_v():
+                self.assertEqual(id2 in reached, graphAlgo.reachable(id1, id2))
+                self.assertEqual(id2 in reached, orders.reachable(csr.index[id1], csr.index[id2]))
+                if id2 not in reached:
+                    self.assertEqual((float('inf'), []), graphAlgo.shortest_path(id1, id2))
+        self.assertFalse(graphAlgo.reachable(1, 101))
+        # The index is built again for the new version of the graph
+        self.assertFalse(graphAlgo.reachable(0, 100))
+        graph.add_edge(0, 100, 1)
+        self.assertTrue(graphAlgo.reachable(0, 100))
+        self.assertIsNot(index, graphAlgo.reachability_index())
+        self.assertAlmostEqual(graphAlgo.shortest_path(20, 2, "dijkstra")[0], graphAlgo.shortest_path(20, 2)[0])
+        # A query after a change does not build the index again, and does not use the old one
+        index = graphAlgo.reachability
+        graph.add_node(101)
+        graph.add_edge(1, 101, 1)
+        self.assertListEqual([1, 101], graphAlgo.shortest_path(1, 101)[1])
+        self.assertIs(index, graphAlgo.reachability)
+
+    def test_hop_distances(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/A5"))
+        graph = graphAlgo.get_graph()
+        graph.remove_edge(13, 14)
+        hops = graphAlgo.hop_distances(0)
+        self.assertEqual(0, hops[0])
+        self.assertEqual(1, hops[1])
+        self.assertNotIn(20, hops)
+        # Each node is one hop farther than the nearest node that has an edge to it
+        for key, hop in hops.items():
+            if key != 0:
+                self.assertEqual(hop, 1 + min(hops[src] for src in graph.all_in_edges_of_node(key) if src in hops))
+        self.assertSetEqual({node.getKey() for node in graphAlgo.BFS(20, False)}, graphAlgo.reachable_set(20, False))
+        self.assertSetEqual({node.getKey() for node in graphAlgo.BFS(20, True)}, graphAlgo.reachable_set(20))
+        self.assertDictEqual({}, graphAlgo.hop_distances(100))
+
+    def test_plot_graph_to_file(self):
+        if importlib.util.find_spec("matplotlib") is None:
+            self.skipTest("matplotlib is not installed")
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/G_1000_8000_1.json"))
+        mc = graphAlgo.get_graph().get_mc()
+        with tempfile.TemporaryDirectory() as folder:
+            graphAlgo.plot_graph(os.path.join(folder, "graph.png"))
+            with open(os.path.join(folder, "graph.png"), "rb") as file:
+                self.assertEqual(b"\x89PNG", file.read(4))
+            graphAlgo.plot_graph(os.path.join(folder, "graph.svg"), labels=False)
+            with open(os.path.join(folder, "graph.svg")) as file:
+                self.assertIn("<svg", file.read())
+        self.assertEqual(mc, graphAlgo.get_graph().get_mc())
+
+    def test_layout(self):
+        if importlib.util.find_spec("numpy") is None:
+            self.skipTest("numpy is not installed")
+        graph = createGraph(100)
+        for i in range(100):
+            graph.add_edge(i, (i + 1) % 100, 1)
+            graph.add_edge(i, (i * 7) % 100, 1)
+        graphAlgo = GraphAlgo(graph)
+        pos = graphAlgo.layout(seed=1)
+        self.assertEqual(100, len(pos))
+        self.assertDictEqual(pos, graphAlgo.layout(seed=1))
+        self.assertNotEqual(pos, graphAlgo.layout(seed=2))
+        # The positions are not written to the graph
+        self.assertTrue(all(node.getPos() is None for node in graph.get_all_v().values()))
+        # The edges are shorter than the distances between random nodes
+        length = sum(math.dist(pos[i], pos[(i + 1) % 100]) for i in range(100))
+        spread = sum(math.dist(pos[i], pos[(i * 37 + 11) % 100]) for i in range(100))
+        self.assertLess(2 * length, spread)
+        for key, (x, y) in pos.items():
+            graph.get_all_v()[key].setPos((x, y, 0))
+        graph.add_node(100)
+        graph.add_edge(100, 0, 1)
+        fixed = graphAlgo.layout(seed=1, fixed=True)
+        for key in range(100):
+            self.assertEqual(pos[key], fixed[key])
+        # The new node is placed next to its neighbor, closer than most of the nodes
+        distances = sorted(math.dist(fixed[0], fixed[key]) for key in range(1, 100))
+        self.assertLess(math.dist(fixed[100], fixed[0]), distances[50])
+        # A layout that starts from the positions moves the nodes a little
+        moved = graphAlgo.layout(iterations=5, seed=1)
+        self.assertLess(sum(math.dist(pos[key], moved[key]) for key in range(100)), spread / 2)
+        self.assertIsNone(graph.get_all_v()[100].getPos())
+
+    def test_numpy_rows(self):
+        if importlib.util.find_spec("numpy") is None:
+            self.skipTest("numpy is not installed")
+        import numpy as np
+        graph = DiGraph()
+        self.assertListEqual([(3, "duplicate")], graph.add_nodes_from(np.array([0, 1, 2, 2])))
+        self.assertListEqual([], graph.add_edges_from(np.array([[0, 1, 1.5], [1, 2, 2.0]])))
+        self.assertTrue(all(type(key) is int for key in graph.get_all_v()))
+        self.assertTrue(all(type(key) is int for key in graph.all_out_edges_of_node(0)))
+        # The graph is saved as plain JSON and loaded back the same
+        with tempfile.TemporaryDirectory() as folder:
+            file_name = os.path.join(folder, "numpy.json")
+            self.assertTrue(GraphAlgo(graph).save_to_json(file_name))
+            loaded = GraphAlgo(DiGraph())
+            self.assertTrue(loaded.load_from_json(file_name))
+        self.assertEqual(graph, loaded.get_graph())
+        self.assertEqual((3.5, [0, 1, 2]), loaded.shortest_path(0, 2))
+
+    def test_snapshot_threads(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/A5"))
+        graph = graphAlgo.get_graph()
+        published = [graph.snapshot()]
+        seen = []
+        done = []
+
+        def read():
+            # Each query runs on the last snapshot the writer published, without a lock
+            while not done:
+                snapshot = published[-1]
+                reader = GraphAlgo(snapshot)
+                seen.append((snapshot, reader.shortest_path(0, 40), reader.connected_component(0)))
+
+        threads = [Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        rand = random.Random(5)
+        for step in range(300):
+            id1, id2 = rand.randrange(48), rand.randrange(48)
+            if not graph.remove_edge(id1, id2):
+                graph.add_edge(id1, id2, rand.uniform(1, 2))
+            if step % 10 == 0:
+                published.append(graph.snapshot())
+        done.append(True)
+        for thread in threads:
+            thread.join()
+        self.assertGreater(len(seen), 0)
+        for snapshot, path, component in seen[::max(1, len(seen) // 50)]:
+            # The snapshot kept its content, and the queries saw that content
+            fingerprint = sum(DiGraph.node_hash(key) for key in snapshot.get_all_v())
+            fingerprint += sum(DiGraph.edge_hash(src, dest, weight) for src in snapshot.get_all_v()
+                               for dest, weight in snapshot.all_out_edges_of_node(src).items())
+            self.assertEqual(snapshot.fingerprint(), fingerprint & ((1 << 64) - 1))
+            copy = GraphAlgo(snapshot.subgraph(snapshot.get_all_v()))
+            self.assertEqual(copy.shortest_path(0, 40), path)
+            self.assertListEqual(sorted(copy.connected_component(0)), sorted(component))
@@ -0,0 +1,134 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from DiGraph import DiGraph
+from GraphAlgo import GraphAlgo
+from GraphJournal import HEADER, GraphJournal
+
+
+def edit(graph):
+    """A few changes of every kind"""
+    graph.remove_edge(13, 14)
+    graph.add_node(100, (35.2, 32.1, 0.0))
+    graph.add_node(101)
+    graph.add_edge(100, 101, 2.5)
+    graph.add_edge(0, 100, 1.25)
+    graph.remove_node(20)
+
+
+class TestGraphJournal(TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.journal = os.path.join(self.dir.name, "A5.journal")
+        self.graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(self.graphAlgo.load_from_json("../data/A5"))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_replay(self):
+        graph = self.graphAlgo.get_graph()
+        journal = graph.start_journal(self.journal)
+        self.assertIs(journal, graph.journal())
+        edit(graph)
+        # The changes cost a few bytes each, not the size of the graph
+        self.assertLess(journal.flush(), 400)
+        self.assertEqual(0, journal.flush())
+        loaded = GraphAlgo(DiGraph())
+        self.assertTrue(loaded.load("../data/A5", self.journal))
+        self.assertEqual(graph, loaded.get_graph())
+        self.assertGreaterEqual(loaded.get_graph().get_mc(), graph.get_mc())
+        self.assertEqual((35.2, 32.1, 0.0), loaded.get_graph().get_all_v()[100].getPos())
+        self.assertIsNone(loaded.get_graph().get_all_v()[101].getPos())
+        self.assertEqual(self.graphAlgo.shortest_path(0, 101), loaded.shortest_path(0, 101))
+        # The changes after the last flush are not in the file
+        graph.remove_edge(100, 101)
+        self.assertTrue(loaded.load("../data/A5", self.journal))
+        self.assertIn(101, loaded.get_graph().all_out_edges_of_node(100))
+        graph.stop_journal()
+        self.assertIsNone(graph.journal())
+
+    def test_mc_goes_on(self):
+        graph = self.graphAlgo.get_graph()
+        journal = graph.start_journal(self.journal)
+        graph.remove_edge(13, 14)
+        journal.flush()
+        # A base graph that was changed more times than the graph the journal recorded
+        base = GraphAlgo(DiGraph())
+        self.assertTrue(base.load_from_json("../data/A5"))
+        for _ in range(100):
+            base.get_graph().add_node(200)
+            base.get_graph().remove_node(200)
+        mc = base.get_graph().get_mc()
+        self.assertGreater(mc, graph.get_mc())
+        GraphJournal.replay(self.journal, base.get_graph())
+        self.assertEqual(graph, base.get_graph())
+        self.assertGreaterEqual(base.get_graph().get_mc(), mc)
+
+    def test_go_on(self):
+        graph = self.graphAlgo.get_graph()
+        journal = graph.start_journal(self.journal)
+        graph.remove_edge(13, 14)
+        journal.flush()
+        # A graph loaded from the base and the journal goes on recording in the same journal
+        loaded = GraphAlgo(DiGraph())
+        self.assertTrue(loaded.load("../data/A5", self.journal))
+        loaded.get_graph().start_journal(self.journal)
+        loaded.get_graph().add_edge(13, 14, 7.5)
+        loaded.get_graph().journal().flush()
+        again = GraphAlgo(DiGraph())
+        self.assertTrue(again.load("../data/A5", self.journal))
+        self.assertEqual(7.5, again.get_graph().all_out_edges_of_node(13)[14])
+        # The journal of one graph can not go on in a different graph
+        self.assertRaises(ValueError, DiGraph().start_journal, self.journal)
+
+    def test_bad_journal(self):
+        graph = self.graphAlgo.get_graph()
+        journal = graph.start_journal(self.journal)
+        graph.remove_edge(13, 14)
+        journal.flush()
+        size = os.path.getsize(self.journal)
+        graph.remove_node(3)
+        journal.flush()
+        # A flush cut in the middle is ignored
+        with open(self.journal, "r+b") as file:
+            file.truncate(os.path.getsize(self.journal) - 5)
+        loaded = GraphAlgo(DiGraph())
+        self.assertTrue(loaded.load("../data/A5", self.journal))
+        self.assertIn(3, loaded.get_graph().get_all_v())
+        self.assertNotIn(14, loaded.get_graph().all_out_edges_of_node(13))
+        with open(self.journal, "r+b") as file:
+            file.truncate(size)
+        # A journal of a different base
+        self.assertFalse(loaded.load("../data/G_10_80_1.json", self.journal))
+        self.assertEqual(47, max(loaded.get_graph().get_all_v()))
+        self.assertFalse(loaded.load("../data/A5", "../data/A5"))
+
+    def test_compact(self):
+        base = os.path.join(self.dir.name, "A5.json")
+        self.assertFalse(self.graphAlgo.compact_journal(base))
+        self.assertTrue(self.graphAlgo.save_to_json(base))
+        graph = self.graphAlgo.get_graph()
+        journal = graph.start_journal(self.journal)
+        edit(graph)
+        journal.flush()
+        self.assertTrue(self.graphAlgo.compact_journal(base))
+        self.assertEqual(HEADER.size, os.path.getsize(self.journal))
+        loaded = GraphAlgo(DiGraph())
+        self.assertTrue(loaded.load(base, self.journal))
+        self.assertEqual(graph, loaded.get_graph())
+        # A binary base, and a compaction cut before the journal started again: the journal has the changes the
+        # new base has, they are skipped
+        binary = os.path.join(self.dir.name, "A5.bin")
+        self.assertTrue(self.graphAlgo.save_binary(binary))
+        journal.reset()
+        graph.add_edge(101, 100, 3.0)
+        journal.flush()
+        self.assertTrue(self.graphAlgo.save_binary(binary))
+        graph.remove_edge(0, 100)
+        journal.flush()
+        self.assertTrue(loaded.load(binary, self.journal))
+        self.assertEqual(graph, loaded.get_graph())
+        self.assertGreaterEqual(loaded.get_graph().get_mc(), graph.get_mc())
@@ -0,0 +1,38 @@
+import io
+import json
+from unittest import TestCase
+
+from JsonStream import JsonStream
+
+
+class TestJsonStream(TestCase):
+
+    def test_items(self):
+        with open("../data/G_10_80_1.json") as file:
+            document = json.load(file)
+        # A small chunk size cuts the values between the pieces of the file
+        for chunk_size in (1, 7, 1 << 16):
+            with open("../data/G_10_80_1.json") as file:
+                items = list(JsonStream(file, chunk_size).items(("Nodes", "Edges")))
+            self.assertListEqual(document["Edges"], [value for key, value in items if key == "Edges"])
+            self.assertListEqual(document["Nodes"], [value for key, value in items if key == "Nodes"])
+
+    def test_values(self):
+        text = ' { "a" : 12345 , "Nodes": [ ], "b": [1, {"c": 2.5}], "Edges" : [ {"src": 1} ,{"src": 2}] } '
+        items = list(JsonStream(io.StringIO(text), 2).items(("Nodes", "Edges")))
+        self.assertListEqual([("a", 12345), ("b", [1, {"c": 2.5}]), ("Edges", {"src": 1}), ("Edges", {"src": 2})],
+                             items)
+        self.assertListEqual([], list(JsonStream(io.StringIO("{}")).items()))
+        with self.assertRaises(ValueError):
+            list(JsonStream(io.StringIO('{"Edges": [{"src": 1}')).items(("Edges",)))
+        with self.assertRaises(ValueError):
+            list(JsonStream(io.StringIO('[1, 2]')).items())
+
+    def test_numbers_cut(self):
+        # A number cut by the end of a piece after "12.", "2e" or "-" is read whole, at every chunk size
+        for text, key in (('{"a": 12.5}', None), ('{"Edges": [1.25, 2e5, -3, 4E-2]}', "Edges")):
+            document = json.loads(text)
+            expected = [(key, value) for value in document[key]] if key else list(document.items())
+            for chunk_size in range(1, len(text) + 1):
+                items = list(JsonStream(io.StringIO(text), chunk_size).items((key,) if key else ()))
+                self.assertListEqual(expected, items, chunk_size)
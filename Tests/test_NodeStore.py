@@ -0,0 +1,88 @@
+import random
+from unittest import TestCase
+
+from DiGraph import DiGraph
+from GraphAlgo import GraphAlgo
+from NodeStore import NodeStore
+
+
+class TestNodeStore(TestCase):
+
+    def test_views(self):
+        store = NodeStore()
+        store.add(5, (1.5, 2, 3))
+        store.add(7)
+        store.add(9, (4, 5))
+        self.assertListEqual([5, 7, 9], list(store))
+        self.assertEqual(3, len(store))
+        self.assertNotIn(6, store)
+        self.assertIsNone(store.get(6))
+        self.assertRaises(KeyError, store.__getitem__, 6)
+        node = store[5]
+        self.assertEqual(5, node.getKey())
+        self.assertEqual((1.5, 2, 3), node.getPos())
+        self.assertIsNone(store[7].getPos())
+        self.assertEqual((4, 5), store[9].getPos())
+        self.assertEqual(" ", node.getInfo())
+        self.assertEqual(0, node.getTag())
+        self.assertEqual(0, node.getWeight())
+        # A view writes to the columns, a new view of the node reads the change
+        node.setInfo("red")
+        node.setTag(3)
+        node.setWeight(2.5)
+        node.setPos((0, 0, 0))
+        self.assertEqual("red", store[5].getInfo())
+        self.assertEqual(3, store[5].getTag())
+        self.assertEqual(2.5, store[5].getWeight())
+        self.assertEqual((0, 0, 0), store[5].getPos())
+        self.assertEqual(DiGraph.nodeData(5), store[5])
+        self.assertEqual(store[5], DiGraph.nodeData(5))
+        self.assertNotEqual(store[5], store[7])
+
+    def test_remove_and_pack(self):
+        store = NodeStore()
+        for key in range(10):
+            store.add(key, (key, key, key))
+        store[8].setInfo("eight")
+        for key in (3, 1, 5):
+            store.remove(key)
+        self.assertListEqual([0, 2, 4, 6, 7, 8, 9], list(store))
+        # More than half of the rows are empty, the rows are packed and keep their order
+        for key in (0, 2, 9):
+            store.remove(key)
+        self.assertEqual(4, len(store.ids))
+        self.assertListEqual([4, 6, 7, 8], list(store))
+        self.assertEqual((6, 6, 6), store[6].getPos())
+        self.assertEqual("eight", store[8].getInfo())
+        store.add(3)
+        self.assertListEqual([4, 6, 7, 8, 3], list(store))
+
+    def test_slots(self):
+        node = DiGraph.nodeData(1)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertRaises(AttributeError, setattr, node, "color", "red")
+
+    def test_compact_graph(self):
+        graphAlgo = GraphAlgo(DiGraph())
+        self.assertTrue(graphAlgo.load_from_json("../data/A5"))
+        compactAlgo = GraphAlgo(DiGraph(compact=True))
+        self.assertTrue(compactAlgo.load_from_json("../data/A5"))
+        graph = graphAlgo.get_graph()
+        compact = compactAlgo.get_graph()
+        self.assertIsInstance(compact.get_all_v(), NodeStore)
+        self.assertEqual(graph, compact)
+        self.assertEqual(compact, graph)
+        self.assertDictEqual(graph.as_dict_graph(), compact.as_dict_graph())
+        self.assertEqual(graph.freeze().pos, compact.freeze().pos)
+        self.assertEqual(graphAlgo.shortest_path(0, 40), compactAlgo.shortest_path(0, 40))
+        self.assertListEqual(graphAlgo.connected_components(), compactAlgo.connected_components())
+        # The same changes on both graphs
+        rand = random.Random(1)
+        for _ in range(30):
+            key = rand.randrange(48)
+            self.assertEqual(graph.remove_node(key), compact.remove_node(key))
+            self.assertEqual(graph.add_node(key + 100, (key, key, 0)), compact.add_node(key + 100, (key, key, 0)))
+        self.assertListEqual(list(graph.get_all_v()), list(compact.get_all_v()))
+        self.assertEqual(graph, compact)
+        self.assertEqual(graph.get_mc(), compact.get_mc())
+        self.assertEqual(graph.freeze().pos, compact.freeze().pos)
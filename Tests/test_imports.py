@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The import time budget of each module, in seconds. Measured: DiGraph ~0.02, GraphAlgo ~0.06,
+# GraphAlgo with matplotlib imported at the top took ~0.75
+BUDGETS = {"DiGraph": 0.15, "GraphAlgo": 0.3}
+
+# Modules the import must not load, they are imported only by the code that uses them
+HEAVY = ["matplotlib", "numpy", "asyncio", "multiprocessing"]
+
+
+def measure(module: str):
+    """Imports a module in a new interpreter, returns the import time and the heavy modules it loaded"""
+    code = ("import sys, time\n"
+            "start = time.perf_counter()\n"
+            f"import {module}\n"
+            "print(time.perf_counter() - start)\n"
+            f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))\n")
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.join(ROOT, "src"), ROOT])
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    seconds, loaded = out.stdout.split("\n")[:2]
+    return float(seconds), loaded
+
+
+class TestImports(TestCase):
+
+    def test_import_time(self):
+        for module, budget in BUDGETS.items():
+            # The best of a few runs, so a busy machine does not fail the test
+            runs = [measure(module) for _ in range(3)]
+            seconds = min(seconds for seconds, loaded in runs)
+            self.assertLess(seconds, budget, module)
+            self.assertEqual("", runs[0][1], module)
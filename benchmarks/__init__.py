@@ -0,0 +1,15 @@
+"""
+Benchmarks of GraphAlgo on the graphs of the data folder and on seeded synthetic graphs.
+Run from the root of the project:
+    python -m benchmarks --output results.json
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(ROOT, "data")
+
+# The modules of the project import each other by their plain names, like the tests do
+for path in (os.path.join(ROOT, "src"), ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
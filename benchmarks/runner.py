@@ -0,0 +1,190 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from math import isclose, isinf
+
+from benchmarks import DATA
+from DiGraph import DiGraph
+from GraphAlgo import GraphAlgo
+
+FILES = ["G_10_80_1.json", "G_100_800_1.json", "G_1000_8000_1.json"]
+SYNTHETIC = ["1000x10000", "10000x100000", "100000x1000000"]
+
+
+def synthetic_graph(nodes: int, edges: int, seed: int):
+    """
+    Returns a random graph with positions, the same graph for the same seed.
+    @:param nodes: the number of nodes
+    @:param edges: the number of edges to try to add (self loops and duplicates are dropped)
+    @:param seed: the seed of the random generator
+    """
+    rand = random.Random(seed)
+    graph = DiGraph()
+    graph.add_nodes_from((i, (rand.uniform(35, 36), rand.uniform(32, 33), 0.0)) for i in range(nodes))
+    graph.add_edges_from((rand.randrange(nodes), rand.randrange(nodes), rand.uniform(0.1, 2)) for _ in range(edges))
+    return graph
+
+
+def measure(function, memory: bool):
+    """
+    Runs a function, and runs it again under tracemalloc to find its peak memory.
+    @:return the result of the function, its run time in seconds, its peak memory in bytes (None if not measured)
+    """
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def bench_graph(name: str, file_name: str, queries: int, seed: int, memory: bool, use_networkx: bool,
+                use_ch: bool = False):
+    """
+    Times the methods of GraphAlgo on one graph file.
+    @:param use_ch: also build a contraction hierarchy and time shortest_path on it
+    @:return dictionary of the results
+    """
+    ops = {}
+
+    def record(op, function, calls=1):
+        result, seconds, peak = measure(function, memory)
+        ops[op] = {"calls": calls, "seconds": seconds, "seconds_per_call": seconds / max(calls, 1),
+                   "peak_bytes": peak}
+        return result
+
+    algo = GraphAlgo(DiGraph())
+    record("load_from_json", lambda: algo.load_from_json(file_name))
+    graph = algo.get_graph()
+    with tempfile.TemporaryDirectory() as folder:
+        record("save_to_json", lambda: algo.save_to_json(os.path.join(folder, "graph.json")))
+
+    rand = random.Random(seed)
+    keys = list(graph.get_all_v().keys())
+    pairs = [(rand.choice(keys), rand.choice(keys)) for _ in range(queries)]
+    sources = [rand.choice(keys) for _ in range(queries)]
+    paths = record("shortest_path", lambda: [algo.shortest_path(id1, id2) for id1, id2 in pairs], queries)
+    # The first query of the components scans the graph, the later ones use the components the graph keeps
+    components = record("connected_components", algo.connected_components)
+    record("connected_component", lambda: [algo.connected_component(key) for key in sources], queries)
+
+    result = {"graph": name, "nodes": graph.v_size(), "edges": graph.e_size(), "ops": ops}
+    if use_ch:
+        result["contraction_hierarchy"] = bench_ch(algo, pairs, paths)
+    if use_networkx:
+        result["networkx"] = bench_networkx(graph, pairs, paths, components, memory)
+    return result
+
+
+def bench_ch(algo, pairs, paths):
+    """
+    Builds a contraction hierarchy of the graph and runs the same queries on it.
+    @:return dictionary of the preprocessing time, the number of shortcuts, the query times
+    and if the distances are the same as without the hierarchy
+    """
+    hierarchy = algo.build_contraction_hierarchy()
+    chPaths = [algo.shortest_path(id1, id2, "ch") for id1, id2 in pairs]
+    result = hierarchy.stats()
+    result["seconds_per_query"] = result["query_seconds"] / max(result["queries"], 1)
+    result["match"] = all(isinf(path[0]) and isinf(other[0]) or isclose(path[0], other[0], rel_tol=1e-9, abs_tol=1e-12)
+                          for path, other in zip(paths, chPaths))
+    return result
+
+
+def bench_networkx(graph, pairs, paths, components, memory: bool):
+    """
+    Times NetworkX on the same graph and queries, and checks that it gives the same results.
+    @:return dictionary of the results
+    """
+    import networkx
+
+    G = networkx.DiGraph()
+    G.add_nodes_from(graph.get_all_v().keys())
+    for src in graph.get_all_v().keys():
+        for dest, weight in graph.all_out_edges_of_node(src).items():
+            G.add_edge(src, dest, weight=weight)
+
+    def distance(id1, id2):
+        try:
+            return networkx.dijkstra_path_length(G, id1, id2)
+        except networkx.NetworkXNoPath:
+            return float('inf')
+
+    ops = {}
+    distances, seconds, peak = measure(lambda: [distance(id1, id2) for id1, id2 in pairs], memory)
+    ops["shortest_path"] = {"calls": len(pairs), "seconds": seconds,
+                            "seconds_per_call": seconds / max(len(pairs), 1), "peak_bytes": peak}
+    nxComponents, seconds, peak = measure(lambda: list(networkx.strongly_connected_components(G)), memory)
+    ops["connected_components"] = {"calls": 1, "seconds": seconds, "seconds_per_call": seconds, "peak_bytes": peak}
+
+    same_paths = all(isinf(d) and isinf(path[0]) or isclose(d, path[0], rel_tol=1e-9, abs_tol=1e-12)
+                     for d, path in zip(distances, paths))
+    same_components = sorted(components) == sorted(sorted(c) for c in nxComponents)
+    return {"version": networkx.__version__, "ops": ops,
+            "match": {"shortest_path": same_paths, "connected_components": same_components}}
+
+
+def main(argv=None):
+    """Runs the benchmarks from the command line, returns the exit code"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmarks of GraphAlgo")
+    parser.add_argument("--files", nargs="*", default=FILES,
+                        help="graph files in the data folder (or paths) to run on")
+    parser.add_argument("--synthetic", nargs="*", default=SYNTHETIC, metavar="NODESxEDGES",
+                        help="sizes of seeded synthetic graphs to run on")
+    parser.add_argument("--queries", type=int, default=100, help="number of shortest_path / connected_component calls")
+    parser.add_argument("--seed", type=int, default=1, help="seed of the synthetic graphs and of the queries")
+    parser.add_argument("--no-memory", action="store_true", help="do not measure peak memory (faster)")
+    parser.add_argument("--no-networkx", action="store_true", help="do not compare with NetworkX")
+    parser.add_argument("--ch", action="store_true",
+                        help="also time a contraction hierarchy (slow to build on large random graphs)")
+    parser.add_argument("--output", help="file to write the JSON results to (default: standard output)")
+    args = parser.parse_args(argv)
+
+    use_networkx = not args.no_networkx
+    if use_networkx and importlib.util.find_spec("networkx") is None:
+        print("networkx is not installed, running without the comparison", file=sys.stderr)
+        use_networkx = False
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        graphs = [(name, name if os.path.exists(name) else os.path.join(DATA, name)) for name in args.files]
+        for size in args.synthetic:
+            nodes, edges = (int(x) for x in size.lower().split("x"))
+            file_name = os.path.join(folder, f"synthetic_{size}.json")
+            GraphAlgo(synthetic_graph(nodes, edges, args.seed)).save_to_json(file_name)
+            graphs.append((f"synthetic_{size}", file_name))
+        for name, file_name in graphs:
+            print(f"running {name}", file=sys.stderr)
+            results.append(bench_graph(name, file_name, args.queries, args.seed, not args.no_memory, use_networkx,
+                                       args.ch))
+
+    report = {"python": platform.python_version(), "platform": platform.platform(),
+              "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": args.seed, "queries": args.queries,
+              "results": results}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    ans = 0
+    mismatches = [r["graph"] for r in results if not all(r.get("networkx", {}).get("match", {}).values())]
+    if mismatches:
+        print(f"results differ from NetworkX on: {', '.join(mismatches)}", file=sys.stderr)
+        ans = 1
+    mismatches = [r["graph"] for r in results if not r.get("contraction_hierarchy", {}).get("match", True)]
+    if mismatches:
+        print(f"the contraction hierarchy gives different distances on: {', '.join(mismatches)}", file=sys.stderr)
+        ans = 1
+    return ans
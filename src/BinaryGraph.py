@@ -0,0 +1,184 @@
+"""
+The binary format of a graph, all the numbers are little endian:
+header: magic "DWG1", version (uint32), number of nodes n (int64), number of edges m (int64), flags (uint32), padding
+ids: int64[n]                    the keys of the nodes, in the order of the dense index
+pos: float64[3n]                 x, y, z of each node, NaN for a node without position (only if flags & HAS_POS)
+out_indptr: int64[n + 1], out_indices: int32[m], out_weights: float64[m]     the out edges in CSR format
+in_indptr: int64[n + 1], in_indices: int32[m], in_weights: float64[m]        the in edges in CSR format
+Each section starts at a multiple of 8 bytes.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from math import isnan
+from threading import Lock
+
+from CSRGraph import CSRGraph
+from DiGraph import MASK, DiGraph, GraphSnapshot
+from NodeStore import NodeStore
+
+MAGIC = b"DWG1"
+VERSION = 1
+HAS_POS = 1
+HEADER = struct.Struct("<4sIqqI4x")
+
+
+def save(graph, file_name: str):
+    """
+    Writes a graph to a file in the binary format.
+    @:param graph: the graph (DiGraph)
+    @:param file_name: the path to the out file
+    """
+    csr = graph.freeze()
+    n = csr.v_size()
+    flags = 0
+    sections = [array('q', csr.ids)]
+    # The positions are read from the nodes, a position set on a node does not change the MC (nor the snapshot)
+    pos = CSRGraph.positions(graph)
+    if pos is not None:
+        flags = HAS_POS
+        sections.append(pos)
+    for arrays in (csr.edges(False), csr.edges(True)):
+        sections += arrays
+    with open(file_name, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, n, csr.e_size(), flags))
+        for section in sections:
+            if sys.byteorder != "little":
+                section = array(section.typecode, section)
+                section.byteswap()
+            data = section.tobytes()
+            file.write(data)
+            # Keep the next section aligned to 8 bytes
+            file.write(bytes(-len(data) % 8))
+
+
+def load_csr(file_name: str):
+    """
+    Opens a graph file in the binary format as a CSRGraph.
+    The file is memory mapped and the arrays of the snapshot are views of the mapped file,
+    so opening is immediate and the pages of the file are read only when they are used.
+    @:param file_name: the path to the file
+    @:return CSRGraph of the graph in the file
+    """
+    with open(file_name, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    magic, version, n, m, flags = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{file_name} is not a graph file in the binary format")
+    offset = HEADER.size
+
+    def section(typecode: str, count: int):
+        nonlocal offset
+        size = struct.calcsize(typecode) * count
+        part = view[offset:offset + size].cast(typecode)
+        if len(part) != count:
+            raise ValueError(f"{file_name} is too short")
+        offset += size + (-size % 8)
+        if sys.byteorder != "little":
+            part = array(typecode, part)
+            part.byteswap()
+        return part
+
+    ids = section('q', n)
+    pos = section('d', 3 * n) if flags & HAS_POS else None
+    arrays = []
+    for _ in range(2):
+        arrays += [section('q', n + 1), section('i', m), section('d', m)]
+    return CSRGraph(ids, *arrays, pos=pos)
+
+
+def load(file_name: str, graph):
+    """
+    Reads a graph file in the binary format into an empty graph.
+    The nodes and the edges are added to the graph from the mapped arrays, which costs O(V+E) but parses nothing
+    (about twice as fast as a json file). The mapped snapshot of the file is kept as the CSR snapshot of the graph,
+    so the first query does not build one.
+    @:param file_name: the path to the file
+    @:param graph: an empty graph (DiGraph) to add the nodes and the edges to
+    @:return the graph
+    """
+    csr = load_csr(file_name)
+    ids = csr.ids
+    pos = csr.pos
+    nodes = []
+    for i, key in enumerate(ids):
+        if pos is None or isnan(pos[3 * i]):
+            nodes.append(key)
+        elif isnan(pos[3 * i + 2]):
+            nodes.append((key, (pos[3 * i], pos[3 * i + 1])))
+        else:
+            nodes.append((key, (pos[3 * i], pos[3 * i + 1], pos[3 * i + 2])))
+    graph.add_nodes_from(nodes)
+    indptr, indices, weights = csr.edges(False)
+    graph.add_edges_from((ids[i], ids[indices[e]], weights[e])
+                         for i in range(len(ids)) for e in range(indptr[i], indptr[i + 1]))
+    # The arrays of the file describe the current version of the graph
+    csr.mc = graph.get_mc()
+    csr.fingerprint = graph.fingerprint()
+    graph._frozen = csr
+    return graph
+
+
+def open_graph(file_name: str):
+    """
+    Opens a graph file in the binary format as a read only graph on the memory mapped arrays (see MappedGraph).
+    Nothing is added node by node and edge by edge: opening costs the dictionary of the keys of the nodes,
+    and the pages of the file are read only when they are used.
+    @:param file_name: the path to the file
+    @:return MappedGraph of the graph in the file
+    """
+    return MappedGraph(load_csr(file_name))
+
+
+class MappedGraph(GraphSnapshot):
+    """
+    A read only graph on the memory mapped CSR snapshot of a binary file, returned by open_graph.
+    The mapped snapshot is the CSR snapshot of the graph, so the queries that run on it (the shortest paths,
+    BFS, the indexes) need nothing more. The nodes are a NodeStore on the mapped keys and positions
+    (see NodeStore.mapped). The dictionaries of the edges and the fingerprint are built from the snapshot
+    on their first use (the edges of a node, the components, save_to_json).
+    Like a GraphSnapshot, the methods that change the graph raise TypeError, use load to get a graph to change.
+    """
+
+    def __init__(self, csr):
+        """Initialize the graph of a CSR snapshot, see open_graph"""
+        self.compact = True
+        self.nodes = NodeStore.mapped(csr.ids, csr.pos, csr.index)
+        self.MC = csr.mc
+        self.edgesNum = csr.e_size()
+        self._frozen = csr
+        self._listeners = []
+        self._scc = None
+        self._sccLock = Lock()
+        self._journal = None
+        self._shared = False
+        self._sharedOut = {}
+        self._sharedIn = {}
+        self._snapshots = set()
+        self._snapshotLock = None
+
+    def __getattr__(self, name):
+        """Builds the attributes that are not set yet: the dictionaries of the edges and the fingerprint"""
+        csr = self.__dict__.get("_frozen")
+        if csr is None or name not in ("outEdges", "inEdges", "_fingerprint"):
+            raise AttributeError(name)
+        ids = csr.ids
+        if name == "_fingerprint":
+            fingerprint = sum(DiGraph.node_hash(key) for key in ids)
+            indptr, indices, weights = csr.edges(False)
+            for i, key in enumerate(ids):
+                for e in range(indptr[i], indptr[i + 1]):
+                    fingerprint += DiGraph.edge_hash(key, ids[indices[e]], weights[e])
+            value = csr.fingerprint = fingerprint & MASK
+        else:
+            indptr, indices, weights = csr.edges(name == "inEdges")
+            value = {}
+            for i, key in enumerate(ids):
+                start, end = indptr[i], indptr[i + 1]
+                value[key] = dict(zip([ids[j] for j in indices[start:end]], weights[start:end]))
+        # Two threads may build the same value, the last one is kept
+        self.__dict__[name] = value
+        return value
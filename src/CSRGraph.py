@@ -0,0 +1,505 @@
+from array import array
+from heapq import heappop, heappush
+from math import inf, isnan, nan, sqrt
+
+from NodeStore import NodeStore
+
+
+class CSRGraph:
+    """
+    This class represents a read only snapshot of a directional weighted graph in
+    compressed sparse row (CSR) format.
+    The nodes are numbered 0..n-1 (dense index) in the order of the graph, ids[i] is the key of node i.
+    The edges of each direction are kept in three flat arrays: indptr, indices and weights,
+    the out edges of node i are out_indices[out_indptr[i]:out_indptr[i + 1]] with the matching out_weights,
+    and the same for the in edges.
+    Each edge costs a few bytes in a flat array instead of an entry in a dictionary,
+    and scanning the neighbors of a node reads a continuous part of the memory.
+    """
+
+    def __init__(self, ids, out_indptr, out_indices, out_weights, in_indptr, in_indices, in_weights, mc: int = 0,
+                 pos=None, fingerprint: int = None):
+        """
+        Initialize the arrays of the snapshot, mc is the version of the graph it was built from,
+        pos is the flat array of x, y, z of each node (NaN for a node without position) or None,
+        fingerprint is the fingerprint of the graph it was built from (see DiGraph.fingerprint) or None
+        """
+        self.pos = pos
+        self.fingerprint = fingerprint
+        self.ids = ids
+        self.out_indptr = out_indptr
+        self.out_indices = out_indices
+        self.out_weights = out_weights
+        self.in_indptr = in_indptr
+        self.in_indices = in_indices
+        self.in_weights = in_weights
+        self.mc = mc
+        self.origin = self  # The snapshot this one shares its arrays with, see renewed
+        self._index = None
+        self._scale = None
+
+    @staticmethod
+    def from_graph(graph):
+        """
+        Builds a snapshot of a DiGraph.
+        @:param graph: the graph
+        @:return CSRGraph of the graph
+        """
+        ids = list(graph.get_all_v().keys())
+        index = {key: i for i, key in enumerate(ids)}
+        pos = CSRGraph.positions(graph)
+        arrays = []
+        for edges in (graph.outEdges, graph.inEdges):
+            indptr = array('q', [0])
+            indices = array('i')
+            weights = array('d')
+            for key in ids:
+                row = edges[key]
+                indices.extend([index[k] for k in row])
+                weights.extend(row.values())
+                indptr.append(len(indices))
+            arrays += [indptr, indices, weights]
+        csr = CSRGraph(ids, *arrays, mc=graph.get_mc(), pos=pos, fingerprint=graph.fingerprint())
+        csr._index = index
+        return csr
+
+    @staticmethod
+    def positions(graph):
+        """
+        Reads the positions of the nodes of a graph, in its order.
+        @:return flat array('d') of x, y, z of each node (NaN for a missing value), None if no node has a position
+        """
+        nodes = graph.get_all_v()
+        if isinstance(nodes, NodeStore):
+            # The positions are already in columns
+            pos, hasPos = nodes.positions()
+        else:
+            pos = array('d', [nan]) * (3 * len(nodes))
+            hasPos = False
+            for i, node in enumerate(nodes.values()):
+                p = node.getPos()
+                if p is not None:
+                    hasPos = True
+                    for j, value in enumerate(p[:3]):
+                        pos[3 * i + j] = value
+        return pos if hasPos else None
+
+    def same_positions(self, pos):
+        """Checks if the positions of the snapshot are pos (see positions), NaN included"""
+        if self.pos is None or pos is None:
+            return self.pos is None and pos is None
+        return bytes(self.pos) == bytes(pos)
+
+    def renewed(self, mc: int):
+        """
+        Returns the snapshot of a later version of the graph with the same content: a new snapshot that shares
+        the arrays of this one, so the indexes built on this one can be used with it (see same_content).
+        This snapshot is not changed, other threads may still use it.
+        """
+        csr = CSRGraph(self.ids, self.out_indptr, self.out_indices, self.out_weights, self.in_indptr,
+                       self.in_indices, self.in_weights, mc=mc, pos=self.pos, fingerprint=self.fingerprint)
+        csr.origin = self.origin
+        csr._index = self._index
+        csr._scale = self._scale
+        return csr
+
+    def same_content(self, other):
+        """Checks if another snapshot shares the arrays of this one (one of them was renewed from the other)"""
+        return other is not None and other.origin is self.origin
+
+    def __getstate__(self):
+        """Returns the arrays to pickle, the views of a memory mapped file are copied to arrays"""
+        state = self.__dict__.copy()
+        state["_index"] = None
+        state["_scale"] = None
+        state["origin"] = None
+        for name, value in state.items():
+            if isinstance(value, memoryview):
+                state[name] = array(value.format, value.tobytes())
+        return state
+
+    def __setstate__(self, state):
+        """Restores the pickled arrays, the copy shares its arrays with no other snapshot"""
+        self.__dict__.update(state)
+        self.origin = self
+
+    @property
+    def index(self):
+        """Returns a dictionary from the key of each node to its dense index"""
+        if self._index is None:
+            self._index = {key: i for i, key in enumerate(self.ids)}
+        return self._index
+
+    def v_size(self):
+        """Returns the number of nodes in the snapshot"""
+        return len(self.out_indptr) - 1
+
+    def e_size(self):
+        """Returns the number of edges in the snapshot"""
+        return len(self.out_indices)
+
+    def edges(self, reverse: bool = False):
+        """
+        Returns the indptr, indices and weights arrays of one direction.
+        @:param reverse: False for the out edges, True for the in edges ("transpose" graph)
+        """
+        if reverse:
+            return self.in_indptr, self.in_indices, self.in_weights
+        return self.out_indptr, self.out_indices, self.out_weights
+
+    def dijkstra(self, src: int, target: int = None, reverse: bool = False):
+        """
+        Dijkstra's algorithm with a binary heap and lazy deletion, from the node of dense index src.
+        @:param src: dense index of the src node
+        @:param target: dense index of a node to stop at when it is settled, None to scan all the reachable nodes
+        @:param reverse: True to scan the in edges, that is the distances to src
+        @:return dictionary of the distance of each node we reached, dictionary of the parent of each node
+        """
+        indptr, indices, weights = self.edges(reverse)
+        dist = {src: 0}
+        parents = {}
+        settled = set()
+        heap = [(0, src)]
+        while heap:
+            weight, u = heappop(heap)
+            # An old entry of a node that we already settled
+            if u in settled:
+                continue
+            settled.add(u)
+            if u == target:
+                break
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                if v in settled:
+                    continue
+                newWeight = weight + weights[e]
+                if newWeight < dist.get(v, inf):
+                    dist[v] = newWeight
+                    parents[v] = u
+                    heappush(heap, (newWeight, v))
+        return dist, parents
+
+    def bidirectional_path(self, src: int, target: int):
+        """
+        Bidirectional Dijkstra: a forward scan from src over the out edges and a backward scan from target
+        over the in edges, each step advances the scan with the smaller heap.
+        Each time a scan reaches a node the other scan already reached, the path through this node is a candidate.
+        The scans stop when the smallest keys of the two heaps add up to at least the best candidate,
+        no path that was not seen yet can be shorter.
+        @:param src: dense index of the src node
+        @:param target: dense index of the target node
+        @:return the distance of the path, the list of the keys of the nodes on the path (inf, [] if there is none)
+        """
+        if src == target:
+            return 0, [self.ids[src]]
+        dist = ({src: 0}, {target: 0})
+        parents = ({}, {})
+        settled = (set(), set())
+        heaps = ([(0, src)], [(0, target)])
+        edges = (self.edges(False), self.edges(True))
+        best = inf
+        meet = None
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            heap = heaps[side]
+            weight, u = heappop(heap)
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+            sideDist = dist[side]
+            otherDist = dist[1 - side]
+            sideParents = parents[side]
+            indptr, indices, weights = edges[side]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                if v in settled[side]:
+                    continue
+                newWeight = weight + weights[e]
+                if newWeight < sideDist.get(v, inf):
+                    sideDist[v] = newWeight
+                    sideParents[v] = u
+                    heappush(heap, (newWeight, v))
+                    # A path from src to target through v
+                    if v in otherDist and newWeight + otherDist[v] < best:
+                        best = newWeight + otherDist[v]
+                        meet = v
+        if meet is None:
+            return inf, []
+        path = self.path_to(parents[0], meet)
+        i = parents[1].get(meet)
+        while i is not None:
+            path.append(self.ids[i])
+            i = parents[1].get(i)
+        return best, path
+
+    def heuristic_scale(self):
+        """
+        Checks if the distance between the positions of two nodes can be used as a lower bound
+        of the weight of the path between them (an admissible heuristic for A*).
+        The scale is the smallest ratio between the weight of an edge and the distance between its nodes,
+        so for every edge scale * distance <= weight, and the scaled distance never overestimates a path,
+        also when the weights are smaller than the distances.
+        The scale is computed once for the snapshot.
+        @:return the scale, 0 if the heuristic can not be used (nodes without position, or an edge of weight 0
+        between two different positions)
+        """
+        if self._scale is None:
+            pos = self.pos
+            scale = 0
+            if pos is not None and not any(isnan(value) for value in pos):
+                indptr, indices, weights = self.out_indptr, self.out_indices, self.out_weights
+                scale = inf
+                for u in range(self.v_size()):
+                    ux, uy, uz = pos[3 * u], pos[3 * u + 1], pos[3 * u + 2]
+                    for e in range(indptr[u], indptr[u + 1]):
+                        v = indices[e]
+                        d = sqrt((pos[3 * v] - ux) ** 2 + (pos[3 * v + 1] - uy) ** 2 + (pos[3 * v + 2] - uz) ** 2)
+                        if d > 0 and weights[e] < scale * d:
+                            scale = weights[e] / d
+                # Leave a margin for the rounding of the floats
+                scale = 0 if scale == inf else scale * (1 - 1e-9)
+            self._scale = scale
+        return self._scale
+
+    def position_heuristic(self, target: int):
+        """
+        Returns the heuristic of A* to target by the positions of the nodes: the distance between the position
+        of a node and the position of target, times heuristic_scale().
+        @:param target: dense index of the target node
+        @:return function from a dense index to a lower bound of the distance of its path to target
+        """
+        scale = self.heuristic_scale()
+        pos = self.pos
+        tx, ty, tz = pos[3 * target], pos[3 * target + 1], pos[3 * target + 2]
+
+        def heuristic(v: int):
+            return scale * sqrt((pos[3 * v] - tx) ** 2 + (pos[3 * v + 1] - ty) ** 2 + (pos[3 * v + 2] - tz) ** 2)
+
+        return heuristic
+
+    def astar_path(self, src: int, target: int, heuristic=None):
+        """
+        A* search from src to target, the nodes are scanned by their distance from src plus a lower bound
+        of their distance to target (the heuristic).
+        The heuristic must be consistent, so each node is settled once and the scan stops when target is settled.
+        A node with an infinite lower bound can not reach target and is not scanned.
+        @:param src: dense index of the src node
+        @:param target: dense index of the target node
+        @:param heuristic: function from a dense index to its lower bound, None for position_heuristic(target)
+        @:return the distance of the path, the list of the keys of the nodes on the path (inf, [] if there is none)
+        """
+        if heuristic is None:
+            heuristic = self.position_heuristic(target)
+        indptr, indices, weights = self.out_indptr, self.out_indices, self.out_weights
+        dist = {src: 0}
+        bounds = {}  # The heuristic of each node we reached, computed once
+        parents = {}
+        settled = set()
+        heap = [(0, src)]
+        while heap:
+            u = heappop(heap)[1]
+            # An old entry of a node that we already settled
+            if u in settled:
+                continue
+            settled.add(u)
+            if u == target:
+                return dist[u], self.path_to(parents, u)
+            weight = dist[u]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                if v in settled:
+                    continue
+                newWeight = weight + weights[e]
+                if newWeight < dist.get(v, inf):
+                    h = bounds.get(v)
+                    if h is None:
+                        h = bounds[v] = heuristic(v)
+                    if h == inf:
+                        continue
+                    dist[v] = newWeight
+                    parents[v] = u
+                    heappush(heap, (newWeight + h, v))
+        return inf, []
+
+    def path_to(self, parents: dict, target: int):
+        """
+        Returns the keys of the nodes on a path, following the parents from target back to the src node.
+        @:param parents: dictionary of the parent of each dense index
+        @:param target: dense index of the last node of the path
+        @:return list of keys
+        """
+        ids = self.ids
+        path = []
+        i = target
+        while i is not None:
+            path.append(ids[i])
+            i = parents.get(i)
+        path.reverse()
+        return path
+
+    def bfs(self, src: int, reverse: bool = False):
+        """
+        Returns a list of the dense indices of the nodes we can reach from src, in the order they were reached.
+        @:param src: dense index of the src node
+        @:param reverse: True to scan the in edges ("transpose" graph)
+        """
+        indptr, indices, _ = self.edges(reverse)
+        visited = bytearray(self.v_size())
+        visited[src] = 1
+        order = [src]
+        head = 0
+        # The list of the reached nodes is also the queue of the scan
+        while head < len(order):
+            u = order[head]
+            head += 1
+            for v in indices[indptr[u]:indptr[u + 1]]:
+                if not visited[v]:
+                    visited[v] = 1
+                    order.append(v)
+        return order
+
+    def bfs_levels(self, sources, reverse: bool = False):
+        """
+        Level synchronous BFS: the hop distance of each node from the nearest of the sources.
+        All the nodes of a level (the frontier) are expanded at once. With NumPy each level is a few array operations
+        over the whole frontier, and each level runs in the direction that reads fewer edges:
+        top-down reads the edges out of the frontier, bottom-up reads the edges into the nodes that were not reached
+        yet and keeps the ones that have an edge from the frontier (better when the frontier is most of the graph).
+        Without NumPy the levels are expanded in Python.
+        @:param sources: dense indices of the src nodes
+        @:param reverse: True to scan the in edges ("transpose" graph)
+        @:return array of the hop distance of each node (dense index), -1 for a node that can not be reached
+        (a NumPy array when NumPy is installed)
+        """
+        try:
+            import numpy
+        except ImportError:
+            return self.bfs_levels_python(sources, reverse)
+        n = self.v_size()
+        dist = numpy.full(n, -1, dtype=numpy.int32)
+        frontier = numpy.unique(numpy.asarray(list(sources), dtype=numpy.int64))
+        if n == 0 or len(frontier) == 0:
+            return dist
+        # Views of the arrays of the two directions, no copy
+        forward, backward = [(numpy.frombuffer(indptr, dtype=numpy.int64), numpy.frombuffer(indices, dtype=numpy.int32))
+                             for indptr, indices, _ in (self.edges(reverse), self.edges(not reverse))]
+        inDegree = numpy.diff(backward[0])
+        dist[frontier] = 0
+        # The number of edges into the nodes that were not reached yet
+        unvisitedEdges = int(inDegree.sum() - inDegree[frontier].sum())
+        level = 0
+        while len(frontier):
+            level += 1
+            indptr, indices = forward
+            frontierEdges = int((indptr[frontier + 1] - indptr[frontier]).sum())
+            if frontierEdges <= unvisitedEdges:
+                # Top-down: the heads of the edges out of the frontier
+                heads = indices[CSRGraph.gather(indptr, frontier)]
+                frontier = numpy.unique(heads[dist[heads] < 0])
+            else:
+                # Bottom-up: the nodes not reached yet with an edge from the frontier
+                indptr, indices = backward
+                unvisited = numpy.flatnonzero(dist < 0)
+                tails = indices[CSRGraph.gather(indptr, unvisited)]
+                owners = numpy.repeat(unvisited, indptr[unvisited + 1] - indptr[unvisited])
+                frontier = numpy.unique(owners[dist[tails] == level - 1])
+            dist[frontier] = level
+            unvisitedEdges -= int(inDegree[frontier].sum())
+        return dist
+
+    @staticmethod
+    def gather(indptr, rows):
+        """Returns the positions of the edges of the given rows in the CSR arrays, as one NumPy array"""
+        import numpy
+        starts = indptr[rows]
+        counts = indptr[rows + 1] - starts
+        total = int(counts.sum())
+        # For each edge: its position in its row plus the start of its row
+        offsets = numpy.repeat(starts - (numpy.cumsum(counts) - counts), counts)
+        return numpy.arange(total, dtype=numpy.int64) + offsets
+
+    def bfs_levels_python(self, sources, reverse: bool = False):
+        """
+        Level synchronous BFS without NumPy, see bfs_levels.
+        @:return array('i') of the hop distance of each node (dense index), -1 for a node that can not be reached
+        """
+        indptr, indices, _ = self.edges(reverse)
+        dist = array('i', [-1]) * self.v_size()
+        frontier = []
+        for src in sources:
+            if dist[src] == -1:
+                dist[src] = 0
+                frontier.append(src)
+        level = 0
+        while frontier:
+            level += 1
+            nextFrontier = []
+            for u in frontier:
+                for v in indices[indptr[u]:indptr[u + 1]]:
+                    if dist[v] == -1:
+                        dist[v] = level
+                        nextFrontier.append(v)
+            frontier = nextFrontier
+        return dist
+
+    def scc(self, roots=None):
+        """
+        Iterative Tarjan's algorithm, runs in O(V+E) over the nodes reachable from the roots.
+        Yields every Strongly Connected Component(SCC) as a list of dense indices, in the order they are closed
+        (a component is always yielded before any component that can reach it).
+        @:param roots: dense indices to start the scanning from, None for all the nodes
+        """
+        n = self.v_size()
+        indptr, indices = self.out_indptr, self.out_indices
+        order = array('q', [-1]) * n  # The order in which each node was discovered
+        low = array('q', [0]) * n  # The lowest discovery order that the node can reach while on the stack
+        nextEdge = array('q', [0]) * n  # The next out edge of each node to scan
+        onStack = bytearray(n)
+        stack = []
+        counter = 0
+        for root in range(n) if roots is None else roots:
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            nextEdge[root] = indptr[root]
+            stack.append(root)
+            onStack[root] = 1
+            work = [root]
+            while work:
+                v = work[-1]
+                e = nextEdge[v]
+                end = indptr[v + 1]
+                while e < end:
+                    w = indices[e]
+                    e += 1
+                    # A node we have not discovered yet, continue the scan from it
+                    if order[w] == -1:
+                        order[w] = low[w] = counter
+                        counter += 1
+                        nextEdge[w] = indptr[w]
+                        stack.append(w)
+                        onStack[w] = 1
+                        work.append(w)
+                        break
+                    if onStack[w] and order[w] < low[v]:
+                        low[v] = order[w]
+                nextEdge[v] = e
+                if work[-1] != v:
+                    continue
+                # All the neighbors of v were scanned
+                work.pop()
+                if work and low[v] < low[work[-1]]:
+                    low[work[-1]] = low[v]
+                # v is the root of a connected component, pop it from the stack
+                if low[v] == order[v]:
+                    component = []
+                    while True:
+                        w = stack.pop()
+                        onStack[w] = 0
+                        component.append(w)
+                        if w == v:
+                            break
+                    yield component
@@ -0,0 +1,256 @@
+from array import array
+from heapq import heapify, heappop, heappush
+from math import inf
+from time import perf_counter
+
+
+class ContractionHierarchy:
+    """
+    This class represents a contraction hierarchy of a graph, for fast shortest path queries on a graph
+    that does not change.
+    Preprocessing contracts the nodes one by one, from the least important to the most important:
+    a contracted node is removed from the graph, and for each path u -> v -> w through it that is the only
+    shortest path from u to w, a shortcut edge u -> w of the same weight is added.
+    The order of contraction is the rank of a node, and each node keeps only its edges to nodes of higher rank
+    (the upward graph).
+    A shortest path always goes up in rank and then down, so a query is a bidirectional Dijkstra in which both
+    scans only go up, and it scans a few hundred nodes instead of the whole graph.
+    The shortcuts of the path are unpacked back to the edges of the graph.
+    The hierarchy belongs to one CSR snapshot of the graph, after a change of the graph it can not be used.
+    """
+
+    def __init__(self, csr, rank, up_out, up_in, mid, preprocess_seconds: float):
+        """
+        Initialize the hierarchy.
+        @:param csr: the snapshot of the graph the hierarchy was built on
+        @:param rank: the order of contraction of each node
+        @:param up_out: (indptr, indices, weights) of the edges from each node to nodes of higher rank
+        @:param up_in: (indptr, indices, weights) of the edges to each node from nodes of higher rank
+        @:param mid: dictionary from a shortcut (u, w) to the node it goes through
+        @:param preprocess_seconds: the time it took to build the hierarchy
+        """
+        self.csr = csr
+        self.rank = rank
+        self.up_out = up_out
+        self.up_in = up_in
+        self.mid = mid
+        self.preprocess_seconds = preprocess_seconds
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.last_query_seconds = 0.0
+
+    @staticmethod
+    def build(csr, witness_limit: int = 500):
+        """
+        Orders the nodes and contracts them.
+        The next node to contract is the one with the smallest priority: twice the edge difference (the number
+        of shortcuts its contraction adds, minus the number of its edges), plus the number of its neighbors that
+        were contracted and the level of the node, so the contractions are spread over the graph.
+        The counters of the neighbors of a node are updated when it is contracted, and the shortcuts of a node
+        are counted again only when it comes out of the heap, it is put back if it is no longer the smallest.
+        @:param csr: the snapshot of the graph
+        @:param witness_limit: the number of nodes each search for a path that makes a shortcut unneeded
+        may scan, a search that stops early only adds shortcuts that are not needed
+        @:return ContractionHierarchy
+        """
+        start = perf_counter()
+        n = csr.v_size()
+        # The remaining graph: node -> {neighbor: weight}
+        out = [{} for _ in range(n)]
+        inn = [{} for _ in range(n)]
+        indptr, indices, weights = csr.edges(False)
+        for u in range(n):
+            for e in range(indptr[u], indptr[u + 1]):
+                out[u][indices[e]] = weights[e]
+                inn[indices[e]][u] = weights[e]
+        mid = {}
+        deleted = [0] * n
+
+        def witness(u: int, v: int, limit: float):
+            """Dijkstra from u in the remaining graph without v, up to the distance limit or until the out
+            neighbors of v are all scanned"""
+            dist = {u: 0}
+            heap = [(0, u)]
+            targets = len(out[v]) - (u in out[v])
+            scanned = 0
+            while heap and scanned < witness_limit and targets > 0:
+                weight, x = heappop(heap)
+                if weight > dist[x]:
+                    continue
+                if weight > limit:
+                    break
+                scanned += 1
+                if x in out[v] and x != u:
+                    targets -= 1
+                for y, edge in out[x].items():
+                    newWeight = weight + edge
+                    if y != v and newWeight < dist.get(y, inf):
+                        dist[y] = newWeight
+                        heappush(heap, (newWeight, y))
+            return dist
+
+        def shortcuts(v: int):
+            """The shortcuts needed to contract v"""
+            result = []
+            if not inn[v] or not out[v]:
+                return result
+            maxOut = max(out[v].values())
+            for u, inWeight in inn[v].items():
+                # Any path found is a witness, also if the search stopped before it was the shortest
+                dist = witness(u, v, inWeight + maxOut)
+                for w, outWeight in out[v].items():
+                    if w != u and dist.get(w, inf) > inWeight + outWeight:
+                        result.append((u, w, inWeight + outWeight))
+            return result
+
+        # The length of the longest chain of contracted nodes below each node
+        level = [0] * n
+
+        # The number of shortcuts the contraction of each node needed when it was last checked
+        needed = [len(shortcuts(v)) for v in range(n)]
+
+        def priority(v: int):
+            return 2 * (needed[v] - len(inn[v]) - len(out[v])) + deleted[v] + level[v]
+
+        current = [priority(v) for v in range(n)]
+        heap = [(p, v) for v, p in enumerate(current)]
+        heapify(heap)
+        rank = array('i', [-1]) * n
+        upOut = [None] * n
+        upIn = [None] * n
+        order = 0
+        while heap:
+            p, v = heappop(heap)
+            if rank[v] >= 0 or p != current[v]:
+                # A node that was contracted, or an old priority
+                continue
+            added = shortcuts(v)
+            needed[v] = len(added)
+            current[v] = priority(v)
+            if heap and current[v] > heap[0][0]:
+                heappush(heap, (current[v], v))
+                continue
+            rank[v] = order
+            order += 1
+            # All the remaining neighbors of v are contracted after it
+            upOut[v] = out[v]
+            upIn[v] = inn[v]
+            neighbors = set(out[v]) | set(inn[v])
+            for w in out[v]:
+                del inn[w][v]
+            for u in inn[v]:
+                del out[u][v]
+            for u, w, weight in added:
+                if weight < out[u].get(w, inf):
+                    out[u][w] = weight
+                    inn[w][u] = weight
+                    mid[(u, w)] = v
+            # The edges and the counters of the neighbors changed, their shortcuts are counted again
+            # only when they come out of the heap
+            for u in neighbors:
+                deleted[u] += 1
+                level[u] = max(level[u], level[v] + 1)
+                current[u] = priority(u)
+                heappush(heap, (current[u], u))
+
+        def pack(rows):
+            indptr = array('q', [0])
+            indices = array('i')
+            weights = array('d')
+            for row in rows:
+                indices.extend(row.keys())
+                weights.extend(row.values())
+                indptr.append(len(indices))
+            return indptr, indices, weights
+
+        return ContractionHierarchy(csr, rank, pack(upOut), pack(upIn), mid, perf_counter() - start)
+
+    def unpack(self, u: int, w: int, path: list):
+        """
+        Appends the nodes of an edge of the upward graph, without u, to a path.
+        A shortcut is replaced by the two edges it was made of, until only edges of the graph are left.
+        """
+        stack = [(u, w)]
+        while stack:
+            x, y = stack.pop()
+            v = self.mid.get((x, y))
+            if v is None:
+                path.append(y)
+            else:
+                stack.append((v, y))
+                stack.append((x, v))
+
+    def shortest_path(self, src: int, target: int):
+        """
+        Bidirectional Dijkstra on the upward graph: a forward scan from src over the upward out edges and a
+        backward scan from target over the upward in edges. Each scan stops when its smallest key is at least
+        the best path found, the scans can not stop together as in a plain bidirectional Dijkstra,
+        because the top of the path may be reached by one scan long after the other.
+        @:param src: dense index of the src node
+        @:param target: dense index of the target node
+        @:return the distance of the path, the list of the keys of the nodes on the path (inf, [] if there is none)
+        """
+        start = perf_counter()
+        dist = ({src: 0}, {target: 0})
+        parents = ({src: None}, {target: None})
+        heaps = ([(0, src)], [(0, target)])
+        edges = (self.up_out, self.up_in)
+        best = inf if src != target else 0
+        meet = None if src != target else src
+        side = 1
+        while True:
+            # Take turns, while both scans may still find a better path
+            active = [s for s in (0, 1) if heaps[s] and heaps[s][0][0] < best]
+            if not active:
+                break
+            side = active[0] if len(active) == 1 else 1 - side
+            weight, u = heappop(heaps[side])
+            sideDist = dist[side]
+            if weight > sideDist[u]:
+                continue
+            otherDist = dist[1 - side]
+            if u in otherDist and weight + otherDist[u] < best:
+                best = weight + otherDist[u]
+                meet = u
+            indptr, indices, weights = edges[side]
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                newWeight = weight + weights[e]
+                if newWeight < sideDist.get(v, inf):
+                    sideDist[v] = newWeight
+                    parents[side][v] = u
+                    heappush(heaps[side], (newWeight, v))
+        path = []
+        if meet is not None:
+            # Up from src to the meeting node, then down to target
+            up = [meet]
+            while parents[0][up[-1]] is not None:
+                up.append(parents[0][up[-1]])
+            up.reverse()
+            path.append(src)
+            for u, w in zip(up, up[1:]):
+                self.unpack(u, w, path)
+            u = meet
+            while parents[1][u] is not None:
+                self.unpack(u, parents[1][u], path)
+                u = parents[1][u]
+        seconds = perf_counter() - start
+        self.queries += 1
+        self.query_seconds += seconds
+        self.last_query_seconds = seconds
+        ids = self.csr.ids
+        return best, [ids[i] for i in path]
+
+    def shortcuts(self):
+        """Returns the number of shortcuts in the hierarchy"""
+        return len(self.mid)
+
+    def stats(self):
+        """
+        Returns the counters of the hierarchy
+        @:return dictionary of the nodes, edges and shortcuts, the preprocessing time, the number of queries,
+        their total time and the time of the last query
+        """
+        return {"nodes": self.csr.v_size(), "edges": self.csr.e_size(), "shortcuts": self.shortcuts(),
+                "preprocess_seconds": self.preprocess_seconds, "queries": self.queries,
+                "query_seconds": self.query_seconds, "last_query_seconds": self.last_query_seconds}
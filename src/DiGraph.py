@@ -1,4 +1,14 @@
+import weakref
+from threading import Lock
+
+from CSRGraph import CSRGraph
+from DynamicSCC import DynamicSCC
 from GraphInterface import GraphInterface
+from GraphJournal import GraphJournal
+from NodeStore import NodeStore
+
+# The fingerprint is a sum of hashes modulo 2^64
+MASK = (1 << 64) - 1
 
 
 class DiGraph(GraphInterface):
@@ -7,15 +17,31 @@ class DiGraph(GraphInterface):
    Each graph has dictionary of nodes, inEdges and outEdges, num of edges and num
    of changes that made on the graph(MC).
    The creation of the graph requires the use of vertex-type objects,
-   this object is realized as an internal private class in this class."""
+   this object is realized as an internal private class in this class.
+   A compact graph keeps its nodes in the columns of a NodeStore instead, for graphs of millions of nodes."""
 
-    def __init__(self):
-        """Initialize the properties of the graph"""
-        self.nodes = {}
+    def __init__(self, compact: bool = False):
+        """
+        Initialize the properties of the graph
+        @:param compact: True to keep the nodes in a NodeStore instead of a dictionary of nodeData objects
+        """
+        self.compact = compact
+        self.nodes = NodeStore() if compact else {}
         self.inEdges = {}
         self.outEdges = {}
         self.MC = 0
         self.edgesNum = 0
+        self._frozen = None  # The last CSR snapshot of the graph
+        self._listeners = []  # Objects that are told about each change of the graph, see add_listener
+        self._scc = None  # The components of the graph, kept up to date, see strong_components
+        self._sccLock = Lock()  # Held while the components are created
+        self._fingerprint = 0  # The sum of the hashes of the nodes and the edges, see fingerprint
+        self._journal = None  # The journal the changes of the graph are recorded in, see start_journal
+        self._shared = False  # The dictionaries of the graph are shared with a snapshot, see snapshot
+        self._sharedOut = {}  # The rows of the edges the last snapshot has, they are copied before they are changed
+        self._sharedIn = {}
+        self._snapshots = set()  # A token of each snapshot that is alive
+        self._snapshotLock = Lock()  # Held while the snapshots and the shared dictionaries are changed
 
     def v_size(self):
         """
@@ -65,6 +91,160 @@ class DiGraph(GraphInterface):
         """
         return self.MC
 
+    def fingerprint(self):
+        """
+        Returns a hash of the content of the graph: the sum of the hashes of the keys of the nodes and of the
+        (src, dest, weight) of the edges, modulo 2^64. It is kept up to date by each change, so it costs O(1),
+        and it does not depend on the order the nodes and the edges were added in.
+        Equal graphs have the same fingerprint, graphs with different fingerprints are different.
+        @:return int of 64 bits
+        """
+        return self._fingerprint
+
+    @staticmethod
+    def node_hash(node_id: int):
+        """Returns the hash of a node in the fingerprint"""
+        return hash((0, node_id)) & MASK
+
+    @staticmethod
+    def edge_hash(id1: int, id2: int, weight: float):
+        """Returns the hash of an edge in the fingerprint"""
+        return hash((1, id1, id2, weight)) & MASK
+
+    def freeze(self):
+        """
+        Returns a read only CSR (compressed sparse row) snapshot of the graph.
+        The snapshot is kept and built again only when the MC of the graph changes. After changes that
+        brought back the same content (the same fingerprint, the same order of the nodes and the same positions,
+        such as an edge that was added and removed), the new snapshot shares the arrays of the last one,
+        and the indexes built on the last one are kept (see CSRGraph.renewed).
+        @:return CSRGraph of the current version of the graph
+        """
+        frozen = self._frozen
+        if frozen is None or frozen.mc != self.MC:
+            if frozen is not None and frozen.fingerprint == self._fingerprint and len(frozen.ids) == len(self.nodes) \
+                    and list(frozen.ids) == list(self.nodes) and frozen.same_positions(CSRGraph.positions(self)):
+                frozen = frozen.renewed(self.MC)
+            else:
+                frozen = CSRGraph.from_graph(self)
+            self._frozen = frozen
+        return frozen
+
+    def snapshot(self):
+        """
+        Returns an immutable view of the current version of the graph (its MC), which keeps its content while
+        the graph goes on changing. The snapshot shares the dictionaries of the graph instead of copying them:
+        the first change after a snapshot copies the dictionaries of the nodes and of the rows of the edges
+        (the references only, O(V)), and each change copies only the rows of the edges it touches, the first time
+        it touches them. So a thread that changes the graph and threads that run GraphAlgo queries on snapshots
+        need no lock and no copy of the graph. Take the snapshots in the thread that changes the graph.
+        The node objects are shared, a position, tag or info set on a node of the graph is also seen by the
+        snapshots. A compact graph has no node objects, each snapshot gets a copy of its NodeStore (O(V) arrays),
+        so its snapshots do not see them.
+        When all the snapshots were collected, the graph drops the dictionaries it kept for them.
+        @:return GraphSnapshot of the current version of the graph
+        """
+        snapshot = GraphSnapshot(self)
+        token = object()
+        with self._snapshotLock:
+            self._snapshots.add(token)
+            self._shared = True
+        weakref.finalize(snapshot, self._snapshot_dropped, token)
+        return snapshot
+
+    def _snapshot_dropped(self, token):
+        """Called when a snapshot is collected (in any thread), after the last one nothing is shared"""
+        with self._snapshotLock:
+            self._snapshots.discard(token)
+            if not self._snapshots:
+                self._shared = False
+                self._sharedOut = {}
+                self._sharedIn = {}
+
+    def _unshare(self):
+        """Copies the dictionaries the graph shares with the snapshots, before the first change after a snapshot"""
+        with self._snapshotLock:
+            # The last snapshot may have been collected since the check of the caller
+            if not self._shared:
+                return
+            if not self.compact:
+                # The snapshots of a compact graph have their own copy of the NodeStore
+                self.nodes = self.nodes.copy()
+            self._sharedOut = self.outEdges
+            self._sharedIn = self.inEdges
+            self.outEdges = dict(self.outEdges)
+            self.inEdges = dict(self.inEdges)
+            self._shared = False
+
+    def _out_row(self, node_id: int):
+        """Returns the out edges of a node to change them, a row shared with a snapshot is copied first"""
+        row = self.outEdges[node_id]
+        if row is self._sharedOut.get(node_id):
+            row = self.outEdges[node_id] = dict(row)
+        return row
+
+    def _in_row(self, node_id: int):
+        """Returns the in edges of a node to change them, a row shared with a snapshot is copied first"""
+        row = self.inEdges[node_id]
+        if row is self._sharedIn.get(node_id):
+            row = self.inEdges[node_id] = dict(row)
+        return row
+
+    def add_listener(self, listener):
+        """
+        Tells an object about each change of the graph, after the change is made, by calling its methods:
+        node_added(node_id), node_removed(node_id) (after its edges were removed), edge_added(id1, id2, weight)
+        and edge_removed(id1, id2).
+        @:param listener: the object to tell
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Stops telling an object about the changes of the graph"""
+        self._listeners.remove(listener)
+
+    def strong_components(self):
+        """
+        Returns the Strongly Connected Components(SCC) of the graph, kept up to date while the graph changes.
+        They are found with one scan of the graph on the first call, and after that each change only
+        updates the components it touches.
+        @:return DynamicSCC of the graph
+        """
+        scc = self._scc
+        if scc is None:
+            with self._sccLock:
+                # Another thread may have created them while this one waited
+                scc = self._scc
+                if scc is None:
+                    scc = DynamicSCC(self)
+                    self.add_listener(scc)
+                    self._scc = scc
+        return scc
+
+    def start_journal(self, file_name: str):
+        """
+        Records each change of the graph (added and removed nodes and edges) in an append only journal,
+        its flush() appends the changes since the last flush to the journal file, with the graph's MC and fingerprint.
+        Save the graph first (the base of the journal), GraphAlgo.load loads the base and replays the journal on it.
+        The tags, infos and positions set on the nodes later are not recorded.
+        @:param file_name: the path to the journal file, a new file starts from the current graph, an existing
+        journal whose last flush is the current graph goes on
+        @:return the GraphJournal
+        """
+        self.stop_journal()
+        self._journal = GraphJournal(self, file_name)
+        return self._journal
+
+    def journal(self):
+        """@:return the GraphJournal of the graph, None if its changes are not recorded"""
+        return self._journal
+
+    def stop_journal(self):
+        """Stops recording the changes of the graph, the changes that were not flushed are not written"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
     def add_edge(self, id1: int, id2: int, weight: float):
         """
        Adds an edge to the graph.
@@ -82,10 +262,15 @@ class DiGraph(GraphInterface):
                 # There is an edge between the two nodes
                 if edge is not None:
                     return
-                self.outEdges.get(id1)[id2] = weight
-                self.inEdges.get(id2)[id1] = weight
+                if self._shared:
+                    self._unshare()
+                self._out_row(id1)[id2] = weight
+                self._in_row(id2)[id1] = weight
+                self._fingerprint = (self._fingerprint + DiGraph.edge_hash(id1, id2, weight)) & MASK
                 self.MC += 1  # We will count a change
                 self.edgesNum += 1  # We will add edge
+                for listener in self._listeners:
+                    listener.edge_added(id1, id2, weight)
                 return True
             return False
         return False
@@ -100,41 +285,203 @@ class DiGraph(GraphInterface):
         # This node is already exits in the graph
         if self.nodes.get(node_id) is not None:
             return False
+        if self._shared:
+            self._unshare()
         # Adding the node
-        self.nodes[node_id] = DiGraph.nodeData(node_id, pos)
+        if self.compact:
+            self.nodes.add(node_id, pos)
+        else:
+            self.nodes[node_id] = DiGraph.nodeData(node_id, pos)
         # Create new dictionaries for the edges of the new node
         self.inEdges[node_id] = {}
         self.outEdges[node_id] = {}
+        self._fingerprint = (self._fingerprint + DiGraph.node_hash(node_id)) & MASK
         self.MC += 1
+        for listener in self._listeners:
+            listener.node_added(node_id)
         return True
 
+    def add_nodes_from(self, nodes):
+        """
+        Adds many nodes to the graph, the MC is increased once for all of them.
+        @param nodes: iterable of node IDs or of (node_id, pos) pairs, or a NumPy array of node IDs
+        @:return list of (row, reason) pairs of the rows that were not added
+        """
+        if hasattr(nodes, "tolist"):
+            # Like in add_edges_from, the keys of the nodes are taken back to int
+            nodes = (int(node_id) for node_id in nodes.tolist())
+        if self._shared:
+            self._unshare()
+        graphNodes = self.nodes
+        rejected = []
+        added = 0
+        fingerprint = 0
+        for i, node in enumerate(nodes):
+            node_id, pos = node if isinstance(node, tuple) else (node, None)
+            # This node is already exits in the graph
+            if node_id in graphNodes:
+                rejected.append((i, "duplicate"))
+                continue
+            if self.compact:
+                graphNodes.add(node_id, pos)
+            else:
+                graphNodes[node_id] = DiGraph.nodeData(node_id, pos)
+            self.inEdges[node_id] = {}
+            self.outEdges[node_id] = {}
+            fingerprint += DiGraph.node_hash(node_id)
+            added += 1
+            for listener in self._listeners:
+                listener.node_added(node_id)
+        if added:
+            self._fingerprint = (self._fingerprint + fingerprint) & MASK
+            self.MC += 1  # We will count one change for all the nodes
+        return rejected
+
+    def add_edges_from(self, edges):
+        """
+        Adds many edges to the graph, the MC is increased once for all of them.
+        The rows are checked like in add_edge: self loops, negative weights, missing nodes and edges that
+        already exist (in the graph or earlier in the rows) are not added.
+        @param edges: iterable of (src, dest, weight) rows, or a NumPy array of such rows
+        @:return list of (row, reason) pairs of the rows that were not added
+        """
+        if hasattr(edges, "tolist"):
+            # The rows of a NumPy array share one type, the keys of the nodes are taken back to int
+            edges = ((int(id1), int(id2), weight) for id1, id2, weight in edges.tolist())
+        if self._shared:
+            self._unshare()
+        nodes = self.nodes
+        outEdges = self.outEdges
+        inEdges = self.inEdges
+        sharedOut = self._sharedOut
+        sharedIn = self._sharedIn
+        rejected = []
+        added = 0
+        fingerprint = 0
+        for i, (id1, id2, weight) in enumerate(edges):
+            if id1 == id2:
+                rejected.append((i, "self loop"))
+            elif not 0 <= weight:
+                rejected.append((i, "negative weight"))
+            elif id1 not in nodes or id2 not in nodes:
+                rejected.append((i, "missing node"))
+            elif id2 in outEdges[id1]:
+                rejected.append((i, "duplicate"))
+            else:
+                # The rows shared with a snapshot are copied first, like in _out_row and _in_row
+                row = outEdges[id1]
+                if sharedOut and row is sharedOut.get(id1):
+                    row = outEdges[id1] = dict(row)
+                row[id2] = weight
+                row = inEdges[id2]
+                if sharedIn and row is sharedIn.get(id2):
+                    row = inEdges[id2] = dict(row)
+                row[id1] = weight
+                fingerprint += DiGraph.edge_hash(id1, id2, weight)
+                added += 1
+                for listener in self._listeners:
+                    listener.edge_added(id1, id2, weight)
+        if added:
+            self._fingerprint = (self._fingerprint + fingerprint) & MASK
+            self.edgesNum += added
+            self.MC += 1  # We will count one change for all the edges
+        return rejected
+
     def remove_node(self, node_id: int):
         """
-        Removes a node from the graph.
+        Removes a node from the graph, in O(degree): each edge of the node is removed only from the dictionary
+        of its other end, the dictionaries of the node are dropped.
         @param node_id: The node ID
         @:return True if the node was removed successfully, False o.w.
         """
-        if self.nodes.get(node_id) is None:
+        if node_id not in self.nodes:
             return False
-        # All the keys that has a edgeOut between them and node_id
-        keysOut = list(self.outEdges.get(node_id).keys())
-        for i in range(len(keysOut)):
-            # Removing the edge between node_id to keysOut(i)
-            DiGraph.remove_edge(self, node_id, keysOut[i])
-            self.MC -= 1
-        # All the keys that has a edgeIn between them and node_id
-        keysIn = list(self.inEdges.get(node_id).keys())
-        for i in range(len(keysIn)):
-            # Removing the edge between keysIn(i) to node_id
-            DiGraph.remove_edge(self, keysIn[i], node_id)
-            self.MC -= 1
-        # Removing this node
-        del self.inEdges[node_id]
-        del self.outEdges[node_id]
-        del self.nodes[node_id]
+        if self._shared:
+            self._unshare()
+        self._drop_node(node_id)
         self.MC += 1
+        for listener in self._listeners:
+            listener.node_removed(node_id)
         return True
 
+    def remove_nodes_from(self, nodes):
+        """
+        Removes many nodes from the graph, the MC is increased once for all of them.
+        @param nodes: iterable of node IDs
+        @:return list of (row, reason) pairs of the rows that were not removed
+        """
+        if self._shared:
+            self._unshare()
+        rejected = []
+        removed = 0
+        for i, node_id in enumerate(nodes):
+            if node_id not in self.nodes:
+                rejected.append((i, "missing node"))
+                continue
+            self._drop_node(node_id)
+            removed += 1
+            for listener in self._listeners:
+                listener.node_removed(node_id)
+        if removed:
+            self.MC += 1  # We will count one change for all the nodes
+        return rejected
+
+    def _drop_node(self, node_id: int):
+        """Removes a node and all its edges, without counting a change"""
+        outEdges = self.outEdges.pop(node_id)
+        inEdges = self.inEdges.pop(node_id)
+        self.edgesNum -= len(outEdges) + len(inEdges)
+        fingerprint = DiGraph.node_hash(node_id)
+        fingerprint += sum(DiGraph.edge_hash(node_id, dest, weight) for dest, weight in outEdges.items())
+        fingerprint += sum(DiGraph.edge_hash(src, node_id, weight) for src, weight in inEdges.items())
+        self._fingerprint = (self._fingerprint - fingerprint) & MASK
+        for dest in outEdges:
+            del self._in_row(dest)[node_id]
+            for listener in self._listeners:
+                listener.edge_removed(node_id, dest)
+        for src in inEdges:
+            del self._out_row(src)[node_id]
+            for listener in self._listeners:
+                listener.edge_removed(src, node_id)
+        if self.compact:
+            self.nodes.remove(node_id)
+        else:
+            del self.nodes[node_id]
+
+    def subgraph(self, node_ids):
+        """
+        Returns the induced subgraph of some nodes: a new graph of the nodes and the edges between them,
+        built directly from the kept part, so it costs the size of the kept part and not of the removed one.
+        The nodes keep their order in this graph and their position, tag, info and weight.
+        @param node_ids: iterable of node IDs, the IDs that are not in the graph are ignored
+        @:return DiGraph, a compact graph if this graph is compact
+        """
+        nodes = self.nodes
+        keep = {node_id for node_id in node_ids if node_id in nodes}
+        keys = [key for key in nodes if key in keep]
+        graph = DiGraph(self.compact)
+        graph.add_nodes_from((key, nodes[key].getPos()) for key in keys)
+        graphNodes = graph.nodes
+        edges = 0
+        fingerprint = 0
+        for key in keys:
+            node = nodes[key]
+            if node.getTag() != 0 or node.getInfo() != " " or node.getWeight() != 0:
+                copy = graphNodes[key]
+                copy.setTag(node.getTag())
+                copy.setInfo(node.getInfo())
+                copy.setWeight(node.getWeight())
+            out = {dest: weight for dest, weight in self.outEdges[key].items() if dest in keep}
+            graph.outEdges[key] = out
+            graph.inEdges[key] = {src: weight for src, weight in self.inEdges[key].items() if src in keep}
+            edges += len(out)
+            fingerprint += sum(DiGraph.edge_hash(key, dest, weight) for dest, weight in out.items())
+        if edges:
+            graph._fingerprint = (graph._fingerprint + fingerprint) & MASK
+            graph.edgesNum = edges
+            graph.MC += 1  # One change for all the edges, like add_edges_from
+        return graph
+
     def remove_edge(self, node_id1: int, node_id2: int):
         """
         Removes an edge from the graph.
@@ -146,11 +493,16 @@ class DiGraph(GraphInterface):
             return False
         # There is a edge between node_id1 to node_id2
         if self.outEdges.get(node_id1).get(node_id2) is not None:
+            if self._shared:
+                self._unshare()
             #  Removing the edge from outEdges and inEdges
-            del self.outEdges.get(node_id1)[node_id2]
-            del self.inEdges.get(node_id2)[node_id1]
+            weight = self._out_row(node_id1).pop(node_id2)
+            del self._in_row(node_id2)[node_id1]
+            self._fingerprint = (self._fingerprint - DiGraph.edge_hash(node_id1, node_id2, weight)) & MASK
             self.edgesNum -= 1
             self.MC += 1
+            for listener in self._listeners:
+                listener.edge_removed(node_id1, node_id2)
             return True
 
     def as_array_edges(self):
@@ -205,6 +557,9 @@ class DiGraph(GraphInterface):
             # check if the number of nodes in the graphs are equal
             if self.v_size() != other.v_size() or self.e_size() != other.e_size():
                 return False
+            # Graphs with different fingerprints are different, without comparing the nodes and the edges
+            if self.fingerprint() != other.fingerprint():
+                return False
             # Checking if the nodes of the two graphs are equals
             ans = self.get_all_v() == other.get_all_v()
             if ans:
@@ -226,8 +581,11 @@ class DiGraph(GraphInterface):
        This class represents a vertex in  a directional weighted graph.
        Each node has an identity number(unique key), color(info), weight, position
        and tag that represents it in a particular graph.
+       The node has __slots__ and no __dict__, it saves about 40 bytes a node.
        """
 
+        __slots__ = ("pos", "key", "tag", "info", "weight")
+
         def __init__(self, key: int, pos: tuple = None):
             """Initialize the properties of the node"""
             self.pos = pos
@@ -289,7 +647,8 @@ class DiGraph(GraphInterface):
             if isinstance(other, DiGraph.nodeData):
                 # Two nodes is equals if they have the same key
                 return self.key == other.key
-            return False
+            # A view of a node of a NodeStore compares itself
+            return NotImplemented
 
         def __str__(self) -> str:
             """Return string a node with all its information
@@ -312,3 +671,45 @@ class DiGraph(GraphInterface):
             except Exception as e:
                 print(e)
             return node_dict
+
+
+class GraphSnapshot(DiGraph):
+    """
+    An immutable view of a version of a DiGraph, returned by DiGraph.snapshot().
+    It has the read methods of DiGraph on the dictionaries it shares with the graph (the graph copies a dictionary
+    before it changes it), and its MC stays the MC of the graph when it was taken. GraphAlgo runs on it like on
+    a DiGraph, its CSR snapshot and its components are built on the first query and kept.
+    The methods that change the graph raise TypeError.
+    """
+
+    def __init__(self, graph: DiGraph):
+        """Initialize the view of the current version of a graph, see DiGraph.snapshot"""
+        self.compact = graph.compact
+        self.nodes = graph.nodes.copy() if graph.compact else graph.nodes
+        self.inEdges = graph.inEdges
+        self.outEdges = graph.outEdges
+        self.MC = graph.MC
+        self.edgesNum = graph.edgesNum
+        frozen = graph._frozen
+        # The CSR snapshot of the graph is read only, it is shared when it is of this version
+        self._frozen = frozen if frozen is not None and frozen.mc == graph.MC else None
+        self._listeners = []
+        self._scc = None
+        self._sccLock = Lock()
+        self._fingerprint = graph._fingerprint
+        self._journal = None
+        self._shared = False
+        self._sharedOut = {}
+        self._sharedIn = {}
+        self._snapshots = set()
+        self._snapshotLock = None
+
+    def snapshot(self):
+        """A snapshot does not change, it is its own snapshot"""
+        return self
+
+    def changed(self, *args, **kwargs):
+        raise TypeError("a snapshot of a graph can not be changed")
+
+    add_edge = add_node = add_nodes_from = add_edges_from = changed
+    remove_node = remove_nodes_from = remove_edge = start_journal = changed
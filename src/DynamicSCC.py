@@ -0,0 +1,313 @@
+from threading import Lock
+
+
+class DynamicSCC:
+    """
+    This class keeps the Strongly Connected Components(SCC) of a graph up to date while the graph changes,
+    so reading the component of a node costs the size of the component and not a scan of the graph.
+    It listens to the changes of the graph (see DiGraph.add_listener) and keeps:
+    the component of each node, the nodes of each component, and the condensation of the graph
+    (for each component, the number of edges to and from each other component).
+    The components are kept in a topological order of the condensation (Pearce-Kelly): an edge that agrees
+    with the order changes nothing, otherwise only the components whose order is between the two ends of the edge
+    are searched. If the head of the edge reaches its tail, all the components on the cycles it closes are merged,
+    and the searched components are ordered again. A removed edge or node inside a component may split it,
+    the component is marked and checked the next time the components are read: it is still connected if the tail
+    of each removed edge still reaches its head, which a search from both ends usually finds soon.
+    Otherwise only the nodes of the component are scanned again (Tarjan), so a batch of removals costs at most
+    one scan of each component it touched.
+    The split changes the tables in a read, so the split and the reads hold a lock: threads that only read the
+    components can run at the same time, each gets the components after the split.
+    """
+
+    def __init__(self, graph):
+        """
+        Finds the components of the graph with one scan of its CSR snapshot.
+        @:param graph: the graph (DiGraph), the DynamicSCC must then be added as a listener of the graph
+        """
+        self.graph = graph
+        self.comp = {}  # node -> component id
+        self.members = {}  # component id -> set of its nodes
+        self.out = {}  # component id -> {component id: number of edges to it}
+        self.inn = {}  # component id -> {component id: number of edges from it}
+        self.ord = {}  # component id -> its place in a topological order of the condensation (a tuple)
+        self.dirty = {}  # component id -> the edges removed inside it (None if a node was removed), it may be split
+        self.nextId = 0
+        self.lock = Lock()  # Held by split and by the reads
+        csr = graph.freeze()
+        ids = csr.ids
+        # Tarjan closes a component before any component that can reach it
+        for component in reversed(list(csr.scc())):
+            self.new_component(ids[i] for i in component)
+        for node_id in graph.get_all_v():
+            for dest in graph.all_out_edges_of_node(node_id):
+                self.count_edge(node_id, dest, 1)
+
+    def new_component(self, nodes, order: tuple = None):
+        """Makes a component of the nodes, last in the topological order if no order is given, returns its id"""
+        c = self.nextId
+        self.nextId += 1
+        self.ord[c] = (c,) if order is None else order
+        members = set(nodes)
+        for node_id in members:
+            self.comp[node_id] = c
+        self.members[c] = members
+        self.out[c] = {}
+        self.inn[c] = {}
+        return c
+
+    def count_edge(self, id1: int, id2: int, delta: int):
+        """Adds delta to the number of edges between the components of id1 and id2, if they are different"""
+        c1 = self.comp[id1]
+        c2 = self.comp[id2]
+        if c1 == c2:
+            return
+        count = self.out[c1].get(c2, 0) + delta
+        if count:
+            self.out[c1][c2] = count
+            self.inn[c2][c1] = count
+        else:
+            del self.out[c1][c2]
+            del self.inn[c2][c1]
+
+    def node_added(self, node_id: int):
+        """A new node is a component of its own"""
+        self.new_component((node_id,))
+
+    def node_removed(self, node_id: int):
+        """Called after the node and all its edges were removed from the graph"""
+        c = self.comp.pop(node_id)
+        members = self.members[c]
+        members.discard(node_id)
+        if members:
+            self.dirty[c] = None
+        else:
+            self.drop(c)
+
+    def edge_added(self, id1: int, id2: int, weight: float):
+        """
+        An edge from component x to component y that goes back in the topological order closes a cycle
+        if y reaches x. The search from y only goes to components not after x, and the search back from x
+        only to components not before y. The components on the cycles are merged, and the components found
+        by the searches are given their places again: the ones that reach x, then x, then the ones y reaches.
+        """
+        self.count_edge(id1, id2, 1)
+        # A split counts again the edges of the nodes of the component, the new edge included
+        with self.lock:
+            self.split_dirty()
+        x = self.comp[id1]
+        y = self.comp[id2]
+        place = self.ord
+        if x == y or place[x] < place[y]:
+            return
+        # The components reachable from y, up to x in the order
+        forward = self.search(y, self.out, lambda c: place[c] <= place[x])
+        # The components that reach x, from y in the order
+        backward = self.search(x, self.inn, lambda c: place[c] >= place[y])
+        places = sorted(place[c] for c in forward | backward)
+        cycle = forward & backward if x in forward else set()
+        # The components found from x only move back in the order and the ones found from y only move on,
+        # so no edge to or from a component that was not found goes against the order
+        backward = sorted(backward - cycle, key=place.get)
+        forward = sorted(forward - cycle, key=place.get)
+        if cycle:
+            # The merged component has one place, after the components that reach it
+            backward.append(self.merge(cycle))
+        for c, p in zip(backward, places):
+            place[c] = p
+        for c, p in zip(forward, places[len(places) - len(forward):]):
+            place[c] = p
+
+    @staticmethod
+    def search(start: int, edges: dict, inside):
+        """The components reachable from start over the condensation edges, only through components inside"""
+        found = {start}
+        stack = [start]
+        while stack:
+            c = stack.pop()
+            for other in edges[c]:
+                if other not in found and inside(other):
+                    found.add(other)
+                    stack.append(other)
+        return found
+
+    def edge_removed(self, id1: int, id2: int):
+        """An edge inside a component may split it, an edge between components only changes the condensation"""
+        c = self.comp[id1]
+        if c == self.comp[id2]:
+            if c not in self.dirty:
+                self.dirty[c] = []
+            if self.dirty[c] is not None:
+                self.dirty[c].append((id1, id2))
+        else:
+            self.count_edge(id1, id2, -1)
+
+    def merge(self, cycle: set):
+        """
+        Merges components into the largest of them, only the nodes of the smaller ones are moved.
+        @:return the id of the merged component
+        """
+        keep = max(cycle, key=lambda c: len(self.members[c]))
+        members = self.members[keep]
+        out = self.out[keep]
+        inn = self.inn[keep]
+        for c in cycle:
+            if c == keep:
+                continue
+            for node_id in self.members[c]:
+                self.comp[node_id] = keep
+            members |= self.members[c]
+            for other, count in self.out.pop(c).items():
+                if other not in cycle:
+                    out[other] = out.get(other, 0) + count
+                    del self.inn[other][c]
+                    self.inn[other][keep] = out[other]
+            for other, count in self.inn.pop(c).items():
+                if other not in cycle:
+                    inn[other] = inn.get(other, 0) + count
+                    del self.out[other][c]
+                    self.out[other][keep] = inn[other]
+            del self.members[c]
+            del self.ord[c]
+        # The edges between the merged components are inside the component now
+        for c in cycle:
+            out.pop(c, None)
+            inn.pop(c, None)
+        return keep
+
+    def drop(self, c: int):
+        """Removes a component and its edges in the condensation"""
+        for other in self.out.pop(c):
+            del self.inn[other][c]
+        for other in self.inn.pop(c):
+            del self.out[other][c]
+        del self.members[c]
+        del self.ord[c]
+        self.dirty.pop(c, None)
+
+    def split(self):
+        """
+        Scans again the components that may have been split, with Tarjan's algorithm on the edges between
+        their own nodes only, and counts again the edges of their nodes in the condensation.
+        """
+        with self.lock:
+            self.split_dirty()
+
+    def split_dirty(self):
+        """The work of split, the caller holds the lock"""
+        graph = self.graph
+        while self.dirty:
+            c, removed = self.dirty.popitem()
+            members = self.members[c]
+            # Any path that went through a removed edge can go around it
+            if removed is not None and all(self.reaches(u, v, members) for u, v in removed):
+                continue
+            parts = self.tarjan(members)
+            if len(parts) == 1:
+                continue
+            order = self.ord[c]
+            self.drop(c)
+            # The parts take the place of the component, in a topological order among themselves
+            for i, part in enumerate(reversed(parts)):
+                self.new_component(part, order + (i,))
+            for node_id in members:
+                for dest in graph.all_out_edges_of_node(node_id):
+                    self.count_edge(node_id, dest, 1)
+                for src in graph.all_in_edges_of_node(node_id):
+                    # The edges from nodes of the same old component were counted as out edges
+                    if src not in members:
+                        self.count_edge(src, node_id, 1)
+
+    def reaches(self, src: int, dest: int, nodes: set):
+        """
+        Checks if there is a path from src to dest through the given nodes only, with a BFS forward from src and a
+        BFS backward from dest, each step expands the smaller of the two frontiers.
+        """
+        graph = self.graph
+        seen = ({src}, {dest})
+        frontiers = ([src], [dest])
+        edges = (graph.all_out_edges_of_node, graph.all_in_edges_of_node)
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            sideSeen = seen[side]
+            otherSeen = seen[1 - side]
+            frontier = []
+            for v in frontiers[side]:
+                for w in edges[side](v):
+                    if w in otherSeen:
+                        return True
+                    if w not in sideSeen and w in nodes:
+                        sideSeen.add(w)
+                        frontier.append(w)
+            frontiers = (frontier, frontiers[1]) if side == 0 else (frontiers[0], frontier)
+        return False
+
+    def tarjan(self, nodes: set):
+        """
+        Iterative Tarjan's algorithm on the edges between the given nodes.
+        @:return list of the components, each a list of nodes
+        """
+        graph = self.graph
+        order = {}
+        low = {}
+        onStack = set()
+        stack = []
+        components = []
+        for root in nodes:
+            if root in order:
+                continue
+            order[root] = low[root] = len(order)
+            stack.append(root)
+            onStack.add(root)
+            work = [(root, iter(graph.all_out_edges_of_node(root)))]
+            while work:
+                v, edges = work[-1]
+                for w in edges:
+                    if w not in nodes:
+                        continue
+                    # A node we have not discovered yet, continue the scan from it
+                    if w not in order:
+                        order[w] = low[w] = len(order)
+                        stack.append(w)
+                        onStack.add(w)
+                        work.append((w, iter(graph.all_out_edges_of_node(w))))
+                        break
+                    if w in onStack and order[w] < low[v]:
+                        low[v] = order[w]
+                else:
+                    # All the neighbors of v were scanned
+                    work.pop()
+                    if work and low[v] < low[work[-1][0]]:
+                        low[work[-1][0]] = low[v]
+                    # v is the root of a component, pop it from the stack
+                    if low[v] == order[v]:
+                        component = []
+                        while True:
+                            w = stack.pop()
+                            onStack.discard(w)
+                            component.append(w)
+                            if w == v:
+                                break
+                        components.append(component)
+        return components
+
+    def component(self, node_id: int):
+        """
+        Returns the nodes of the component of a node.
+        @:param node_id: the key of the node
+        @:return set of the keys of the nodes in its component (do not change it), None if the node is not
+        in the graph
+        """
+        with self.lock:
+            self.split_dirty()
+            c = self.comp.get(node_id)
+            return None if c is None else self.members[c]
+
+    def components(self):
+        """
+        Returns all the components.
+        @:return list of the sets of the keys of the nodes of each component (do not change them)
+        """
+        with self.lock:
+            self.split_dirty()
+            return list(self.members.values())
@@ -1,22 +1,148 @@
 import json
-import random
-import sys
-from asyncio.queues import PriorityQueue
-from queue import PriorityQueue
-import matplotlib.pyplot as plt
+import os
+from array import array
+import BinaryGraph
+from ContractionHierarchy import ContractionHierarchy
 from DiGraph import DiGraph
 from GraphAlgoInterface import GraphAlgoInterface
+from GraphJournal import GraphJournal
+from JsonStream import JsonStream
+from LandmarkIndex import LandmarkIndex
+import ParallelPaths
+from PathCache import PathCache
+from ReachabilityIndex import ReachabilityIndex
 
 
 class GraphAlgo(GraphAlgoInterface):
     """"
     This class implements the interface of GraphAlgoInterface.
     The class includes a number of algorithms that run on directional weighted graphs.
+    The algorithms keep their state in structures of their own call and never change the nodes of the graph,
+    so a number of threads can run queries on the same graph at the same time.
     """
 
+    # The number of nodes from which shortest_path runs a bidirectional search by default
+    BIDIRECTIONAL_SIZE = 10000
+
     def __init__(self, graph=DiGraph()):
         """Initializes a graph of DiGraph type"""
         self.graph = graph
+        self.cache = None  # The cache of shortest path trees, see enable_cache
+        self.landmarks = None  # The ALT index of the graph, see build_landmark_index
+        self.hierarchy = None  # The contraction hierarchy of the graph, see build_contraction_hierarchy
+        self.reachability = None  # The reachability index of the graph, see reachability_index
+
+    def enable_cache(self, max_entries: int = 128, max_bytes: int = None):
+        """
+        Keeps the whole shortest path tree of each src node that shortest_path runs on,
+        so any later shortest_path from the same src node only reads the path from the tree.
+        The trees are dropped when the MC of the graph changes.
+        @:param max_entries: the number of trees to keep, the least recently used are evicted
+        @:param max_bytes: the estimated size of the trees to keep, None for no bound
+        @:return the PathCache, its stats() has the counters of hits, misses and evictions
+        """
+        self.cache = PathCache(max_entries, max_bytes)
+        return self.cache
+
+    def disable_cache(self):
+        """Stops keeping shortest path trees"""
+        self.cache = None
+
+    def build_landmark_index(self, k: int = 8, strategy: str = "farthest"):
+        """
+        Preprocessing for many shortest_path queries on a graph that does not change:
+        chooses k landmarks and keeps the distances from each of them to every node and from every node to it.
+        shortest_path then runs A* with the lower bounds of the triangle inequality (ALT).
+        The index can not be used after the MC of the graph changes.
+        @:param k: the number of landmarks
+        @:param strategy: "farthest" (spread the landmarks over the graph) or "degree" (the nodes of highest degree)
+        @:return the LandmarkIndex
+        """
+        self.landmarks = LandmarkIndex.build(self.graph.freeze(), k, strategy)
+        return self.landmarks
+
+    def save_landmark_index(self, file_name: str) -> bool:
+        """
+        Saves the landmark index to a file, to be loaded with the same graph, e.g. next to the graph file.
+        @:param file_name/ The path to the out file
+        @:return True if the save was successful, False o.w.
+        """
+        ans = True
+        try:
+            self.landmark_index().save(file_name)
+        except Exception as e:
+            print(e)
+            ans = False
+        return ans
+
+    def load_landmark_index(self, file_name: str) -> bool:
+        """
+        Loads a landmark index that was saved for the current graph.
+        @:param file_name /The path to the file
+        @:returns True if the loading was successful, False o.w. (also if the index is of a different graph)
+        """
+        ans = True
+        try:
+            self.landmarks = LandmarkIndex.load(file_name, self.graph.freeze())
+        except Exception as e:
+            print(e)
+            ans = False
+        return ans
+
+    def landmark_index(self):
+        """
+        @:return the landmark index of the current version of the graph, None if there is none
+        """
+        if self.landmarks is not None and self.graph.freeze().same_content(self.landmarks.csr):
+            return self.landmarks
+        return None
+
+    def build_contraction_hierarchy(self, witness_limit: int = 500):
+        """
+        Preprocessing for fast shortest_path queries on a graph that does not change:
+        contracts the nodes in order of importance and adds shortcut edges, so a query only scans up the hierarchy
+        from both ends of the path. The hierarchy can not be used after the MC of the graph changes.
+        @:param witness_limit: the number of nodes each search for a shortcut may scan
+        (more makes fewer shortcuts and a slower preprocessing)
+        @:return the ContractionHierarchy, its stats() has the preprocessing time, the number of shortcuts
+        and the time of the queries
+        """
+        self.hierarchy = ContractionHierarchy.build(self.graph.freeze(), witness_limit)
+        return self.hierarchy
+
+    def contraction_hierarchy(self):
+        """
+        @:return the contraction hierarchy of the current version of the graph, None if there is none
+        """
+        if self.hierarchy is not None and self.graph.freeze().same_content(self.hierarchy.csr):
+            return self.hierarchy
+        return None
+
+    def reachability_index(self):
+        """
+        Returns the reachability index of the current version of the graph, it is built on the first call
+        and built again after the MC of the graph changes.
+        From the first call on, reachable uses it, and shortest_path uses it while the graph does not change
+        to return at once for a pair of nodes with no path between them.
+        @:return the ReachabilityIndex
+        """
+        csr = self.graph.freeze()
+        if self.reachability is None or not csr.same_content(self.reachability.csr):
+            self.reachability = ReachabilityIndex.build(csr)
+        return self.reachability
+
+    def reachable(self, id1: int, id2: int) -> bool:
+        """
+        Checks if there is a path from node id1 to node id2, with the reachability index (no scan of the graph).
+        @:param id1: The start node id
+        @:param id2: The end node id
+        @:return True if id2 can be reached from id1, False o.w. (also if one of the nodes is not in the graph)
+        """
+        nodes = self.graph.get_all_v()
+        if nodes.get(id1) is None or nodes.get(id2) is None:
+            return False
+        index = self.graph.freeze().index
+        return self.reachability_index().reachable(index[id1], index[id2])
 
     def get_graph(self):
         """
@@ -27,29 +153,36 @@ class GraphAlgo(GraphAlgoInterface):
     def load_from_json(self, file_name: str):
         """
         Loads a graph from a json file.
+        The file is read element by element, so the whole document is never held in memory.
+        The new graph keeps its nodes like the current graph (see DiGraph compact).
         @:param file_name /The path to the json file
         @:returns True if the loading was successful, False o.w.
         """
         ans = True
         try:
             with open(file_name, "r") as file:
-                graph = DiGraph()
-                dict = json.load(file)
-                # The array of the nodes
-                nodes = dict.get("Nodes")
-                # The array of the edges
-                edges = dict.get("Edges")
-                for dictNodes in nodes:
-                    # Adding a node with position
-                    if dictNodes.get("pos") is not None:
-                        pos = tuple(map(float, dictNodes.get("pos").split(',')))
-                        graph.add_node(dictNodes.get("id"), pos)
-                    # Adding a node with out position
-                    else:
-                        graph.add_node(dictNodes.get("id"))
-                # Adding the edges to the graph
-                for dictEdges in edges:
-                    graph.add_edge(dictEdges.get("src"), dictEdges.get("dest"), dictEdges.get("w"))
+                graph = DiGraph(self.graph.compact)
+                # The edges wait in flat arrays until all the nodes were added,
+                # the file may list the edges before the nodes
+                src = array('q')
+                dest = array('q')
+                weights = array('d')
+                # Read the file element by element instead of loading the whole document
+                for key, value in JsonStream(file).items(("Nodes", "Edges")):
+                    if key == "Nodes":
+                        # Adding a node with position
+                        if value.get("pos") is not None:
+                            pos = tuple(map(float, value.get("pos").split(',')))
+                            graph.add_node(value.get("id"), pos)
+                        # Adding a node with out position
+                        else:
+                            graph.add_node(value.get("id"))
+                    elif key == "Edges":
+                        src.append(value.get("src"))
+                        dest.append(value.get("dest"))
+                        weights.append(value.get("w"))
+                # Adding all the edges to the graph at once
+                graph.add_edges_from(zip(src, dest, weights))
                 self.graph = graph
         except Exception as e:
             print(e)
@@ -72,106 +205,225 @@ class GraphAlgo(GraphAlgoInterface):
             ans = False
         return ans
 
+    def save_binary(self, file_name: str) -> bool:
+        """
+        Saves the graph to a file in a compact binary format:
+        the keys and the positions of the nodes and the CSR arrays of the edges.
+        @:param file_name/ The path to the out file
+        @:return True if the save was successful, False o.w.
+        """
+        ans = True
+        try:
+            BinaryGraph.save(self.graph, file_name)
+        except Exception as e:
+            print(e)
+            ans = False
+        return ans
+
+    def load_binary(self, file_name: str, read_only: bool = False) -> bool:
+        """
+        Loads a graph from a file in the binary format of save_binary.
+        The file is memory mapped and nothing is parsed: the nodes and the edges are added from the mapped arrays
+        (O(V+E), about twice as fast as load_from_json), and the mapped arrays are kept as the CSR snapshot
+        of the graph. The new graph keeps its nodes like the current graph (see DiGraph compact).
+        A read only graph is opened at once on the mapped arrays, nothing is added (see BinaryGraph.MappedGraph):
+        the queries read the pages of the file they use, and the methods that change the graph raise TypeError.
+        @:param file_name /The path to the file
+        @:param read_only /True to open the file as a read only graph
+        @:returns True if the loading was successful, False o.w.
+        """
+        ans = True
+        try:
+            if read_only:
+                self.graph = BinaryGraph.open_graph(file_name)
+            else:
+                self.graph = BinaryGraph.load(file_name, DiGraph(self.graph.compact))
+        except Exception as e:
+            print(e)
+            ans = False
+        return ans
+
+    def load(self, file_name: str, journal: str = None) -> bool:
+        """
+        Loads a graph from a json file or a binary file (see save_binary), and replays the changes recorded
+        in a journal on it (see DiGraph.start_journal), so the graph is as it was at the last flush of the journal.
+        @:param file_name /The path to the base file of the journal
+        @:param journal /The path to the journal file, None to only load the base
+        @:returns True if the loading was successful, False o.w. (also if the journal is of a different graph)
+        """
+        try:
+            with open(file_name, "rb") as file:
+                binary = file.read(len(BinaryGraph.MAGIC)) == BinaryGraph.MAGIC
+        except Exception as e:
+            print(e)
+            return False
+        old = self.graph
+        if not (self.load_binary(file_name) if binary else self.load_from_json(file_name)):
+            return False
+        ans = True
+        if journal is not None:
+            try:
+                GraphJournal.replay(journal, self.graph)
+            except Exception as e:
+                print(e)
+                self.graph = old
+                ans = False
+        return ans
+
+    def compact_journal(self, file_name: str) -> bool:
+        """
+        Saves the graph as the new base of its journal and starts the journal file again, empty.
+        The base is written to a temporary file that replaces file_name at once, so a crash leaves either the old
+        base with the whole journal or the new base, and load skips the changes of the journal the new base has.
+        @:param file_name /The path to the base file, a json file if it ends with .json, o.w. a binary file
+        @:returns True if the compaction was successful, False o.w.
+        """
+        journal = self.graph.journal()
+        if journal is None:
+            print("the changes of the graph are not recorded, see DiGraph.start_journal")
+            return False
+        journal.flush()
+        temp = file_name + ".tmp"
+        if not (self.save_to_json(temp) if file_name.endswith(".json") else self.save_binary(temp)):
+            return False
+        ans = True
+        try:
+            os.replace(temp, file_name)
+            journal.reset()
+        except Exception as e:
+            print(e)
+            ans = False
+        return ans
+
+    def shortest_paths(self, key: int, target: int = None):
+        """
+        Dijkstra's algorithm with a binary heap, start from the src node identified with some key.
+        The heap holds (distance, node) pairs, a node is pushed again each time its distance improves
+        and the old entries are skipped when they are popped (lazy deletion).
+        If a target is given, the scan stops as soon as the target is settled.
+        The scan runs on the CSR snapshot of the graph.
+        @:param key : The key of src node
+        @:param target : The key of the node to stop at, None to scan all the reachable nodes
+        @:return dictionary of the distance of each node we reached, dictionary of the parent of each node
+        """
+        csr = self.graph.freeze()
+        index = csr.index
+        ids = csr.ids
+        dist, parents = csr.dijkstra(index[key], index.get(target))
+        return ({ids[i]: weight for i, weight in dist.items()},
+                {ids[i]: ids[parent] for i, parent in parents.items()})
+
     def Dijkstra(self, key: int):
         """
-        This function scanning this graph using the weight and the info of each node in the graph,
-        start from the src node identified with some key.
         Returns a dictionary of nodes that are in the shortest path from a received node.
         @:param key : The key of src node
         @:return dictionary of keys of nodes
         """
-        dict_parents = {}
-        PQ = PriorityQueue()
-        nodes = self.graph.get_all_v()
-        # Update the weight of each node to infinity and update the color(info) of all the nodes to white.
-        # White node - means we have not visited it yet.
-        for node in nodes.values():
-            node.setWeight(sys.maxsize)
-            node.setInfo("White")
-        # Update the node weight from which we will start scanning the graph to 0
-        srcNode = nodes.get(key)
-        srcNode.setWeight(0)
-        PQ.put((srcNode.getWeight(), srcNode))
-        # A loop that goes through all the nodes that we can reach to them
-        # from the src node.
-        while PQ.qsize() != 0:
-            u = PQ.get()[1]
-            # Black node - means we have updated the minimum weight of the node
-            if u.getInfo() != "Black":
-                for neighborKey in self.graph.all_out_edges_of_node(u.getKey()).keys():
-                    neighborNode = nodes.get(neighborKey)
-                    if neighborNode.getInfo() != "Black":
-                        weight = self.graph.outEdges.get(u.getKey()).get(neighborKey) + u.getWeight()
-                        # Update the min weight of each neighbor of node u.
-                        if weight < neighborNode.getWeight():
-                            neighborNode.setWeight(min(weight, neighborNode.getWeight()))
-                            # Update the parent node of node neighbor to u.
-                            dict_parents[neighborKey] = u.getKey()
-                    # Add to the PQ the node with his current min weight
-                    PQ.put((neighborNode.getWeight(), neighborNode))
-            u.setInfo("Black")
-        return dict_parents
+        return self.shortest_paths(key)[1]
+
+    def shortest_path_lengths(self, sources, targets=None, workers: int = None, chunk_size: int = 16):
+        """
+        Returns the distances of the shortest paths from each of the sources to the targets.
+        The sources are split between a pool of processes, the CSR snapshot of the graph is sent
+        to each process once, and the rows come back in the order of the sources.
+        @:param sources: keys of the src nodes
+        @:param targets: keys of the target nodes, None for all the nodes in the order of get_all_v()
+        @:param workers: the number of processes, None for the number of CPUs, 1 to run in this process
+        @:param chunk_size: the number of sources each process gets at a time
+        @:return iterator of (src key, array('d') of the distances to the targets), inf where there is no path
+        """
+        csr = self.graph.freeze()
+        index = csr.index
+        sources = list(sources)
+        if targets is not None:
+            targets = [index.get(key) for key in targets]
+        rows = ParallelPaths.iter_rows(csr, [index.get(key) for key in sources], targets, workers, chunk_size)
+        return zip(sources, rows)
+
+    def all_pairs_shortest_path(self, workers: int = None):
+        """
+        Returns the distances of the shortest paths between all the pairs of nodes.
+        Row i and column j are the i-th and j-th nodes in the order of get_all_v().
+        @:param workers: the number of processes, None for the number of CPUs, 1 to run in this process
+        @:return n*n NumPy matrix if NumPy is installed, o.w. a list of array('d') rows
+        """
+        ids = self.graph.freeze().ids
+        rows = [row for key, row in self.shortest_path_lengths(ids, workers=workers)]
+        try:
+            import numpy
+        except ImportError:
+            return rows
+        matrix = numpy.empty((len(rows), len(rows)))
+        for i, row in enumerate(rows):
+            matrix[i] = row
+        return matrix
 
     def BFS(self, key: int, regular: bool):
         """
-       Returns an array of nodes that we can reach from the node of this node key
+       Returns an array of nodes that we can reach from the node of this node key.
+       The scan runs on the CSR snapshot of the graph, the nodes of the graph are not changed.
        @:param key : Key of node we search
-       @:param status : True or False
+       @:param regular : True to scan the out edges, False to scan the "transpose" graph
        @:return array of nodes
        """
-        helpList = []
-        resultList = []
         nodes = self.graph.get_all_v()
-        # Update the info of each node, besides the src node to white,
-        # White node - means we have not visited it yet.
-        for node in nodes.values():
-            if node.getKey() == key:
-                node.setInfo("Black")
-                helpList.append(node)
-                resultList.append(node)
-            else:
-                node.setInfo("White")
-        # A loop that goes through all the nodes that we can reach to them
-        # from the src node.
-        while 0 < len(helpList):
-            srcNode = helpList.pop(0)
-            # regular graph
-            if regular:
-                dictKeys = self.graph.all_out_edges_of_node(srcNode.getKey()).keys()
-            # "turn" the edges of the graph
-            else:
-                dictKeys = self.graph.all_in_edges_of_node(srcNode.getKey()).keys()
-            for keyNi in dictKeys:
-                neighborNode = nodes.get(keyNi)
-                # If it is a node that we have not yet reached
-                # and does not belong to any connected component
-                if neighborNode.getInfo() == "White" and neighborNode.getTag != -1:
-                    # Black node - means we were able to reach it from the src node
-                    neighborNode.setInfo("Black")
-                    helpList.append(neighborNode)
-                    resultList.append(neighborNode)
-
-        return resultList
+        if nodes.get(key) is None:
+            return []
+        csr = self.graph.freeze()
+        ids = csr.ids
+        return [nodes[ids[i]] for i in csr.bfs(csr.index[key], not regular)]
+
+    def hop_distances(self, key: int, regular: bool = True):
+        """
+        Returns the number of edges on the shortest path (by hops, not by weight) to each node we can reach
+        from the node of this key, with a level synchronous BFS (see CSRGraph.bfs_levels).
+        @:param key : Key of node we search from
+        @:param regular : True to scan the out edges, False to scan the "transpose" graph (the nodes that reach key)
+        @:return dictionary from the key of each node that can be reached to its hop distance
+        """
+        if self.graph.get_all_v().get(key) is None:
+            return {}
+        csr = self.graph.freeze()
+        ids = csr.ids
+        return {ids[i]: hops for i, hops in enumerate(csr.bfs_levels([csr.index[key]], not regular).tolist())
+                if hops >= 0}
+
+    def reachable_set(self, key: int, regular: bool = True):
+        """
+        Returns the keys of the nodes we can reach from the node of this key (the key itself included).
+        @:param key : Key of node we search from
+        @:param regular : True to scan the out edges, False to scan the "transpose" graph (the nodes that reach key)
+        @:return set of keys
+        """
+        return set(self.hop_distances(key, regular))
+
+    def strongly_connected(self, roots):
+        """
+        Iterative Tarjan's algorithm, runs in O(V+E) over the nodes reachable from the roots.
+        Yields every Strongly Connected Component(SCC) as a list of keys, in the order they are closed
+        (a component is always yielded before any component that can reach it).
+        The scan uses an explicit stack instead of recursion, so there is no recursion-depth limit.
+        @:param roots: keys of the nodes to start the scanning from
+        @:return generator of lists of keys
+        """
+        csr = self.graph.freeze()
+        index = csr.index
+        ids = csr.ids
+        for component in csr.scc([index[key] for key in roots]):
+            yield [ids[i] for i in component]
 
     def connected_component(self, id1: int):
         """
         Finds the Strongly Connected Component(SCC) that node id1 is a part of.
+        The components are kept up to date by the graph while it changes (see DiGraph.strong_components),
+        so this costs the size of the component.
         @:param id1 The node of key=id
         @:return The list of nodes in the SCC
        """
-        # nodes we were able to reach from the src node in the regular graph
-        outList = self.BFS(id1, True)
-        # nodes we were able to reach from the src node in the "transpose" graph
-        self.BFS(id1, False)
-        resultList = []
-        # The connected component of the src node is the intersection between the above two groups
-        for node in outList:
-            # we not reached to this node in the transpose graph
-            if node.getInfo() == "Black":
-                resultList.append(node.getKey())
-                # This node belongs to this connected_component
-                node.setTag(-1)
-        return sorted(resultList)
+        component = self.graph.strong_components().component(id1)
+        if component is None:
+            return []
+        return sorted(component)
 
     def connected_components(self):
         """
@@ -181,25 +433,24 @@ class GraphAlgo(GraphAlgoInterface):
         # empty graph
         if self.graph.v_size() == 0:
             return []
-        nodes = self.graph.get_all_v()
-        # Update the all tag of node to maxsize-
-        # means that no node yet belongs to any connected_component
-        for node in nodes.values():
-            node.setTag(sys.maxsize)
-        listResult = []
-        for node in nodes.values():
-            # If the node already belongs to a connected_component
-            if node.getTag() != -1:
-                listResult.append(self.connected_component(node.getKey()))
-        for node in nodes.values():
-            node.setTag(sys.maxsize)
-        return listResult
-
-    def shortest_path(self, id1: int, id2: int):
+        # a component appears where its first node is in the order of the nodes of the graph
+        place = {key: i for i, key in enumerate(self.graph.get_all_v())}
+        components = sorted(self.graph.strong_components().components(), key=lambda c: min(map(place.get, c)))
+        return [sorted(component) for component in components]
+
+    def shortest_path(self, id1: int, id2: int, method: str = None):
         """
        Returns the shortest path from node id1 to node id2 using Dijkstra's Algorithm
        @:param id1: The start node id
        @:param id2: The end node id
+       @:param method: "dijkstra" for a forward scan from id1 (or the cache, if it is enabled),
+       "bidirectional" for a forward scan from id1 and a backward scan from id2 that meet in the middle,
+       "astar" for A* directed by the positions of the nodes (Dijkstra if the positions can not be used),
+       "alt" for A* directed by the landmark index (Dijkstra if there is no index of the current graph),
+       "ch" for a query of the contraction hierarchy (Dijkstra if there is no hierarchy of the current graph),
+       None to choose by the graph: the cache if it is enabled, the contraction hierarchy or ALT if there is one,
+       A* if all the nodes have positions,
+       bidirectional for graphs of at least BIDIRECTIONAL_SIZE nodes
        @:return: The distance of the path, a list of the nodes ids that the path goes through
        """
         nodes = self.get_graph().get_all_v()
@@ -209,97 +460,87 @@ class GraphAlgo(GraphAlgoInterface):
         # The weight of the path from a node to itself is 0.
         if id1 == id2:
             return 0, [id1]
-        # Run dijkstra on the src node
-        dict_parents = self.Dijkstra(id1)
-        if nodes.get(id2).getWeight() is sys.maxsize:
+        csr = self.graph.freeze()
+        index = csr.index
+        src = index[id1]
+        target = index[id2]
+        # No path, there is nothing to search. The index is used only if it is of the current graph,
+        # a query does not build it again after a change
+        reachability = self.reachability
+        if reachability is not None and csr.same_content(reachability.csr) and not reachability.reachable(src, target):
+            return float('inf'), []
+        landmarks = self.landmark_index()
+        hierarchy = self.contraction_hierarchy()
+        if method is None:
+            if self.cache is not None:
+                method = "dijkstra"
+            elif hierarchy is not None:
+                method = "ch"
+            elif landmarks is not None:
+                method = "alt"
+            elif csr.heuristic_scale() > 0:
+                method = "astar"
+            elif csr.v_size() >= GraphAlgo.BIDIRECTIONAL_SIZE:
+                method = "bidirectional"
+            else:
+                method = "dijkstra"
+        if method == "ch":
+            # Without a hierarchy of the current graph it is Dijkstra
+            if hierarchy is not None:
+                return hierarchy.shortest_path(src, target)
+            method = "dijkstra"
+        if method == "alt":
+            # Without an index of the current graph ALT is Dijkstra
+            if landmarks is not None:
+                return csr.astar_path(src, target, landmarks.heuristic(target))
+            method = "dijkstra"
+        if method == "astar":
+            # Without positions for the heuristic A* is Dijkstra
+            if csr.heuristic_scale() > 0:
+                return csr.astar_path(src, target)
+            method = "dijkstra"
+        if method == "bidirectional":
+            return csr.bidirectional_path(src, target)
+        if method != "dijkstra":
+            raise ValueError(f"Unknown shortest path method: {method}")
+        if self.cache is not None:
+            # The whole tree of the src node, from the cache or by a full run
+            dist, parents = self.cache.get(csr, src)
+        else:
+            # Run dijkstra on the src node until we reach id2
+            dist, parents = csr.dijkstra(src, target)
+        if target not in dist:
             return float('inf'), []
-        list_path = []
-        pathWeight = nodes.get(id2).getWeight()  # The weight of the path
-        list_path.append(id2)
-        key = dict_parents.get(id2)
-        while key is not None:
-            # Adding the nodes that are in this path
-            list_path.insert(0, key)
-            key = dict_parents.get(key)
+        return dist[target], csr.path_to(parents, target)
 
-        return pathWeight, list_path
+    def layout(self, iterations: int = 50, seed: int = None, fixed: bool = False):
+        """
+        Computes positions for the nodes by a Fruchterman-Reingold force directed layout, with NumPy.
+        The layout is incremental: the nodes that have a position start from it, so a layout of a graph that
+        changed a little stays close to the last one.
+        @:param iterations: the number of iterations
+        @:param seed: the seed of the random start positions, the same seed gives the same layout
+        @:param fixed: True to keep the nodes that have a position where they are and only place the others
+        @:return dictionary from the key of each node to its (x, y), the positions are not written to the graph
+        """
+        import GraphLayout
+        csr = self.graph.freeze()
+        xy = GraphLayout.node_positions(self.graph, csr)
+        xy = GraphLayout.fruchterman_reingold(csr, xy, fixed or None, iterations, seed)
+        return {key: (x, y) for key, (x, y) in zip(csr.ids, xy.tolist())}
 
-    def plot_graph(self):
+    def plot_graph(self, file_name: str = None, labels=None):
         """
         Plots the graph.
         If the nodes have a position, the nodes will be placed there.
-        Otherwise, they will be placed in a random but elegant manner.
+        Otherwise, they will be placed by a force directed layout (see layout), the graph is not changed.
+        All the edges are drawn as one collection of lines, so large graphs are drawn in seconds.
+        @:param file_name: the path of a picture file (.png, .svg) to write without a display,
+        None to show the graph in a window
+        @:param labels: True to label all the nodes, False for none, None to label only the nodes that have room
+        for a label on a large graph
         @:return None
         """
-        x = []
-        y = []
-        n = []
-        x1 = 0
-        y1 = 0
-        nodes = self.graph.get_all_v()
-        for node in nodes.keys():
-            # If there is a node without pos
-            if nodes.get(node).getPos() is None:
-                edgeOut = self.graph.all_out_edges_of_node(node)
-                if len(edgeOut) != 0:
-                    # If his neighbors have pos ,take this sum pos
-                    for key in edgeOut.keys():
-                        if nodes.get(key).getPos() is not None:
-                            x1 += nodes.get(key).getPos()[0]
-                            y1 += nodes.get(key).getPos()[1]
-                        else:
-                            x1 = random.randint(0, 1000)
-                            y1 = random.randint(0, 2000)
-                    # Divided by the number of neighbors
-                    pos = (x1 / len(edgeOut), y1 / len(edgeOut))
-                    nodes.get(node).setPos(pos)  # Update the pos of the node
-
-                elif len(edgeOut) == 0:
-                    edgeIn = self.graph.all_in_edges_of_node(node)
-                    # don't have neighbors we take a random pos
-                    if len(edgeIn) == 0:
-                        x1 = random.randint(0, 1000)
-                        y1 = random.randint(0, 1000)
-                        pos = (x1, y1)
-                    elif len(edgeIn) != 0:
-                        for key in edgeIn.keys():
-                            # If his neighbors have pos ,take this sum pos
-                            if nodes.get(key).getPos() is not None:
-                                x1 += nodes.get(key).getPos()[0]
-                                y1 += nodes.get(key).getPos()[1]
-                            else:
-                                x1 = random.randint(0, 1000)
-                                y1 = random.randint(0, 1000)
-                        pos = (x1 / len(edgeIn), y1 / len(edgeIn))  # Divided by the number of edgeIn
-                    nodes.get(node).setPos(pos)  # Update the pos of the node
-            # Adding the updated Corinthians of pos (x,y)
-            x.append(nodes.get(node).getPos()[0])
-            y.append(nodes.get(node).getPos()[1])
-
-        fig, ax = plt.subplots()
-        ax.scatter(x, y)
-
-        for key in nodes.keys():
-            n.append(key)
-
-        # The key of node to put above each node in the graph
-        for i, txt in enumerate(n):
-            ax.annotate(n[i], (nodes.get(n[i]).getPos()[0], nodes.get(n[i]).getPos()[1]), color='red')
-
-        # An arrow between the side of a node and its neighbor
-        for node in nodes.keys():
-            arrow_Out = self.graph.all_out_edges_of_node(node)
-            for edge in arrow_Out.keys():
-                if len(arrow_Out) != 0:
-                    x_out = self.graph.nodes.get(edge).getPos()[0]
-                    y_out = self.graph.nodes.get(edge).getPos()[1]
-                    plt.annotate(s='', xy=(nodes.get(node).getPos()[0], nodes.get(node).getPos()[1]),
-                                 xytext=(x_out, y_out),
-                                 arrowprops=dict(arrowstyle="<|-"))
-
-        plt.plot(x, y, "bo")
-        plt.xlabel('x - axis')
-        plt.ylabel('y - axis')
-        plt.title("Graph Plot")
-        plt.show()
-        plt.close()
+        # matplotlib takes hundreds of milliseconds to import, only the programs that plot pay for it
+        import GraphPlot
+        GraphPlot.plot_graph(self.graph, file_name, labels)
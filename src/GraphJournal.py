@@ -0,0 +1,170 @@
+"""
+The journal file of the changes of a graph, all the numbers are little endian:
+header: magic "GJL1", version (uint32), the fingerprint (uint64) and the MC (int64) of the graph the journal starts from
+records: a code (uint8) and the fields of the change, the MC of the graph after it was told about the change is last:
+    ADD_NODE     key (int64), x, y, z (float64, NaN for a node without position), mc (int64)
+    REMOVE_NODE  key (int64), mc (int64)
+    ADD_EDGE     src (int64), dest (int64), weight (float64), mc (int64)
+    REMOVE_EDGE  src (int64), dest (int64), mc (int64)
+    MARK         mc (int64), fingerprint (uint64), written at the end of each flush
+Only the records up to the last mark are replayed, a flush that was cut in the middle is ignored.
+"""
+
+import os
+import struct
+from math import isnan, nan
+
+MAGIC = b"GJL1"
+VERSION = 1
+HEADER = struct.Struct("<4sIQq")
+
+ADD_NODE = 1
+REMOVE_NODE = 2
+ADD_EDGE = 3
+REMOVE_EDGE = 4
+MARK = 5
+RECORDS = {ADD_NODE: struct.Struct("<qdddq"), REMOVE_NODE: struct.Struct("<qq"), ADD_EDGE: struct.Struct("<qqdq"),
+           REMOVE_EDGE: struct.Struct("<qqq"), MARK: struct.Struct("<qQ")}
+
+
+class GraphJournal:
+    """
+    This class records the changes of a graph in an append only journal, so saving a graph after a few changes
+    costs the size of the changes and not of the graph.
+    It listens to the changes of the graph (see DiGraph.add_listener) and keeps them in a buffer,
+    flush appends the buffer to the journal file. The journal starts from a saved version of the graph (the base),
+    GraphAlgo.load loads the base and replays the journal on it. The fingerprint of the graph (see
+    DiGraph.fingerprint) ties the journal to its base: the header has the fingerprint of the base, and a mark at
+    the end of each flush has the fingerprint of the graph at that point, which the replay checks.
+    Compaction saves the graph as a new base and starts the journal again.
+    """
+
+    def __init__(self, graph, file_name: str):
+        """
+        Starts recording the changes of a graph. A new journal file starts from the current graph, the changes
+        are appended to an existing journal if its last mark is the current graph (the graph was loaded from its
+        base and the journal).
+        @:param graph: the graph (DiGraph)
+        @:param file_name: the path to the journal file
+        """
+        self.graph = graph
+        self.file_name = file_name
+        self.buffer = bytearray()
+        if not os.path.exists(file_name) or os.path.getsize(file_name) == 0:
+            self.reset()
+        else:
+            fingerprint = GraphJournal.read(file_name)[0][-1][1]
+            if fingerprint != graph.fingerprint():
+                raise ValueError(f"{file_name} is a journal of a different graph")
+        graph.add_listener(self)
+
+    def record(self, code: int, *fields):
+        """Adds a record to the buffer"""
+        self.buffer.append(code)
+        self.buffer += RECORDS[code].pack(*fields)
+
+    def node_added(self, node_id: int):
+        pos = self.graph.get_all_v()[node_id].getPos()
+        x, y, z = (nan, nan, nan) if pos is None else (pos[0], pos[1], pos[2] if len(pos) > 2 else nan)
+        self.record(ADD_NODE, node_id, x, y, z, self.graph.get_mc())
+
+    def node_removed(self, node_id: int):
+        self.record(REMOVE_NODE, node_id, self.graph.get_mc())
+
+    def edge_added(self, id1: int, id2: int, weight: float):
+        self.record(ADD_EDGE, id1, id2, weight, self.graph.get_mc())
+
+    def edge_removed(self, id1: int, id2: int):
+        self.record(REMOVE_EDGE, id1, id2, self.graph.get_mc())
+
+    def flush(self):
+        """
+        Appends the changes recorded since the last flush to the journal file, with a mark of the current graph.
+        @:return the number of bytes written
+        """
+        if not self.buffer:
+            return 0
+        graph = self.graph
+        self.record(MARK, graph.get_mc(), graph.fingerprint())
+        with open(self.file_name, "ab") as file:
+            file.write(self.buffer)
+            file.flush()
+            os.fsync(file.fileno())
+        size = len(self.buffer)
+        self.buffer = bytearray()
+        return size
+
+    def reset(self):
+        """Starts the journal file again from the current graph, the changes that were not flushed are dropped"""
+        self.buffer = bytearray()
+        graph = self.graph
+        with open(self.file_name, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, graph.fingerprint(), graph.get_mc()))
+
+    def close(self):
+        """Stops recording the changes of the graph, the changes that were not flushed are dropped"""
+        self.graph.remove_listener(self)
+        self.buffer = bytearray()
+
+    @staticmethod
+    def read(file_name: str):
+        """
+        Reads a journal file.
+        @:return list of the marks as (place, fingerprint, mc), the header is the first with place 0,
+        and the list of the records as (code, fields)
+        """
+        with open(file_name, "rb") as file:
+            data = file.read()
+        magic, version, fingerprint, mc = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file_name} is not a journal file")
+        marks = [(0, fingerprint, mc)]
+        records = []
+        offset = HEADER.size
+        while offset < len(data):
+            code = data[offset]
+            fields = RECORDS.get(code)
+            if fields is None:
+                raise ValueError(f"{file_name} has a wrong record at byte {offset}")
+            if offset + 1 + fields.size > len(data):
+                # A flush that was cut in the middle
+                break
+            values = fields.unpack_from(data, offset + 1)
+            offset += 1 + fields.size
+            if code == MARK:
+                marks.append((len(records), values[1], values[0]))
+            else:
+                records.append((code, values))
+        return marks, records
+
+    @staticmethod
+    def replay(file_name: str, graph):
+        """
+        Makes the changes of a journal on its base graph. If the base was saved after some of the changes
+        (a compaction that was cut before the journal started again), only the changes after it are made.
+        @:param file_name: the path to the journal file
+        @:param graph: the graph loaded from the base of the journal
+        @:return the number of changes made
+        """
+        marks, records = GraphJournal.read(file_name)
+        start = [i for i, (place, fingerprint, mc) in enumerate(marks) if fingerprint == graph.fingerprint()]
+        if not start:
+            raise ValueError(f"{file_name} is a journal of a different graph")
+        first = marks[start[-1]][0]
+        last = marks[-1][0]
+        for code, values in records[first:last]:
+            if code == ADD_NODE:
+                key, x, y, z, mc = values
+                graph.add_node(key, None if isnan(x) else (x, y) if isnan(z) else (x, y, z))
+            elif code == REMOVE_NODE:
+                graph.remove_node(values[0])
+            elif code == ADD_EDGE:
+                graph.add_edge(values[0], values[1], values[2])
+            else:
+                graph.remove_edge(values[0], values[1])
+        place, fingerprint, mc = marks[-1]
+        if graph.fingerprint() != fingerprint:
+            raise ValueError(f"{file_name} does not give the graph it recorded")
+        # The loaded graph goes on from the version the journal recorded, the MC never goes back
+        graph.MC = max(graph.MC, mc)
+        return last - first
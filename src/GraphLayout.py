@@ -0,0 +1,216 @@
+import numpy as np
+
+
+def node_positions(graph, csr):
+    """
+    Returns the positions of the nodes of a graph in the order of its snapshot.
+    They are read from the nodes and not from csr.pos, a position can change without a new version of the graph.
+    @:return n*2 array of the x, y of each node, NaN for a node without position
+    """
+    nodes = graph.get_all_v()
+    xy = np.full((csr.v_size(), 2), np.nan)
+    for i, key in enumerate(csr.ids):
+        pos = nodes[key].getPos()
+        if pos is not None:
+            xy[i, 0] = pos[0]
+            xy[i, 1] = pos[1]
+    return xy
+
+
+def fruchterman_reingold(csr, xy=None, fixed=None, iterations: int = 50, seed: int = None):
+    """
+    Fruchterman-Reingold force directed layout: the edges pull their ends together by d^2/k, all the nodes push
+    each other away by k^2/d, and each node moves by the sum of its forces, up to a temperature that cools down
+    in each iteration. k is the distance between the nodes the layout aims for.
+    The push of the far nodes is approximated by the push of the cells of a grid they are in (see repulsion),
+    so an iteration costs O(V log V + E) and not O(V^2). Everything is done with NumPy arrays, on all the nodes
+    at once, 10^5 nodes take about half a second an iteration.
+    The layout is incremental: the nodes that have a position start from it, a node without position starts
+    next to the average of its neighbors that have a position, and at random if none has.
+    @:param csr: the snapshot of the graph
+    @:param xy: n*2 array of the start positions, NaN for a node without position, None if no node has one
+    @:param fixed: n bools, True for a node that must not move; True for all the nodes that have a position;
+    None for none
+    @:param iterations: the number of iterations
+    @:param seed: the seed of the random positions, None for a different layout each time
+    @:return n*2 array of the positions, in the units of xy (the positions are not written to the graph)
+    """
+    rand = np.random.default_rng(seed)
+    n = csr.v_size()
+    if n == 0:
+        return np.empty((0, 2))
+    indptr = np.frombuffer(csr.out_indptr, dtype=np.int64)
+    dest = np.frombuffer(csr.out_indices, dtype=np.int32).astype(np.int64)
+    src = np.repeat(np.arange(n), np.diff(indptr))
+    # The layout is computed in a square of side sqrt(n), so k is 1, and the result is scaled back
+    side = np.sqrt(n)
+    k = 1.0
+    if xy is None:
+        xy = np.full((n, 2), np.nan)
+    known = ~np.isnan(xy).any(axis=1)
+    if fixed is None:
+        fixed = np.zeros(n, dtype=bool)
+    elif fixed is True:
+        fixed = known
+    else:
+        fixed = np.asarray(fixed, dtype=bool) & known
+    if known.any():
+        low = xy[known].min(axis=0)
+        extent = (xy[known].max(axis=0) - low).max()
+        scale = side / extent if extent > 0 else 1.0
+    else:
+        low = np.zeros(2)
+        scale = 1.0
+    pos = (xy - low) * scale
+    # The nodes without position: next to the average of their neighbors that have one, or at random
+    unknown = ~known
+    if unknown.any():
+        total = np.zeros((n, 2))
+        count = np.zeros(n)
+        for a, b in ((src, dest), (dest, src)):
+            mask = unknown[a] & known[b]
+            count += np.bincount(a[mask], minlength=n)
+            for axis in (0, 1):
+                total[:, axis] += np.bincount(a[mask], weights=pos[b[mask], axis], minlength=n)
+        near = unknown & (count > 0)
+        pos[near] = total[near] / count[near, None] + rand.uniform(-k, k, (near.sum(), 2))
+        far = unknown & (count == 0)
+        pos[far] = rand.uniform(0, side, (far.sum(), 2))
+    moving = ~fixed
+    # A layout that starts from known positions is shaken less
+    temperature = side * (0.1 - 0.08 * known.mean())
+    for step in range(iterations):
+        disp = repulsion(pos, k)
+        delta = pos[src] - pos[dest]
+        dist = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 0.01 * k)
+        pull = delta * (dist / k)[:, None]
+        for axis in (0, 1):
+            disp[:, axis] -= np.bincount(src, weights=pull[:, axis], minlength=n)
+            disp[:, axis] += np.bincount(dest, weights=pull[:, axis], minlength=n)
+        # Move each node in the direction of its force, at most by the temperature
+        length = np.maximum(np.hypot(disp[:, 0], disp[:, 1]), 1e-12)
+        limit = temperature * (1 - step / iterations)
+        move = disp * (np.minimum(length, limit) / length)[:, None]
+        pos[moving] += move[moving]
+    result = pos / scale + low
+    # Not moved and not rounded by the scaling
+    result[fixed] = xy[fixed]
+    return result
+
+
+def cells(pos, size: float):
+    """
+    Puts the nodes in square cells, the cells of each size are made of 2*2 cells of half the size
+    (pos must not be negative).
+    @:return the cell x, y of each node, the sorted keys of the cells that are not empty, the cell of each node
+    (its place in the keys), and the number of columns used to make the keys
+    """
+    cell = np.floor(pos / size).astype(np.int64) + 4
+    width = cell[:, 1].max() + 8
+    keys = cell[:, 0] * width + cell[:, 1]
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return cell, unique, inverse.reshape(-1), width
+
+
+def finder(unique, width: int):
+    """
+    Returns a function from keys of cells to their places in the sorted unique keys, and which of them were found.
+    A table of all the cells is used while it is not much larger than the number of nodes, o.w. a binary search.
+    """
+    if unique[-1] + 4 * width <= 16 * len(unique) + 4096:
+        table = np.full(unique[-1] + 4 * width, -1, dtype=np.int64)
+        table[unique] = np.arange(len(unique))
+
+        def find(keys):
+            at = table[keys]
+            return at, at >= 0
+    else:
+        def find(keys):
+            at = np.minimum(np.searchsorted(unique, keys), len(unique) - 1)
+            return at, unique[at] == keys
+    return find
+
+
+def repulsion(pos, k: float):
+    """
+    The forces k^2/d the nodes push each other by, approximated in the way of Barnes-Hut on a grid:
+    the nodes are put in square cells of size k (or less where they are crowded), a node is pushed by each node
+    in its cell and the 8 cells around it, and by the other cells in the 3*3 cells of double size around its cell
+    of double size, as if all the nodes of a cell were at their center. Then the same with cells of double size,
+    until one level of cells holds all the nodes. Each node is counted once, and the nodes of a far cell are
+    counted together, so an iteration costs O(V log V) instead of O(V^2).
+    All the nodes of a cell get the push of the far cells on the center of the cell.
+    @:return n*2 array of the forces
+    """
+    n = len(pos)
+    pos = pos - pos.min(axis=0)
+    # Smaller cells where the nodes are crowded (in the first iterations), so the pairs of near nodes stay O(V)
+    size = k
+    while size > k / 64 and (np.bincount(cells(pos, size)[2]) ** 2).sum() > 4 * n:
+        size /= 2
+    disp = near(pos, k, size)
+    # The far cells at each level: the cells whose parents are next to the parent of the cell, without the 3*3
+    # cells around it. On each axis, they are at offsets -2..3 from a cell at an even place and -3..2 from a cell
+    # at an odd place, so there are 27 of them for each of the 4 parities of a cell
+    steps = (range(-2, 4), range(-3, 3))
+    offsets = {(px, py): np.array([(dx, dy) for dx in steps[px] for dy in steps[py] if max(abs(dx), abs(dy)) > 1])
+               for px in (0, 1) for py in (0, 1)}
+    while True:
+        cell, unique, inverse, width = cells(pos, size)
+        mass = np.bincount(inverse).astype(float)
+        center = np.stack([np.bincount(inverse, weights=pos[:, axis]) for axis in (0, 1)], axis=1) / mass[:, None]
+        own = np.empty((len(unique), 2), dtype=np.int64)
+        own[inverse] = cell
+        parents = np.floor_divide(own, 2)
+        find = finder(unique, width)
+        force = np.zeros((len(unique), 2))
+        parity = own % 2
+        for (px, py), offset in offsets.items():
+            group = np.nonzero((parity[:, 0] == px) & (parity[:, 1] == py))[0]
+            # All the far cells of all the cells of the group at once, a row for each cell
+            other = own[group, None, :] + offset[None, :, :]
+            at, found = find(other[:, :, 0] * width + other[:, :, 1])
+            a = np.broadcast_to(group[:, None], found.shape)[found]
+            b = at[found]
+            delta = center[a] - center[b]
+            dist2 = np.maximum(delta[:, 0] ** 2 + delta[:, 1] ** 2, (0.01 * k) ** 2)
+            push = mass[b] * k * k / dist2
+            for axis in (0, 1):
+                force[:, axis] += np.bincount(a, weights=delta[:, axis] * push, minlength=len(unique))
+        disp += force[inverse]
+        if (parents.max(axis=0) - parents.min(axis=0)).max() <= 1:
+            return disp
+        size *= 2
+
+
+def near(pos, k: float, size: float):
+    """
+    The push of the nodes in the 3*3 cells around the cell of each node, node by node.
+    The pairs of nodes are made as flat arrays: the nodes are sorted by their cell, then for each of the 9 cells
+    around each node, the range of the nodes of that cell in the sorted order is repeated for the node.
+    @:return n*2 array of the forces
+    """
+    n = len(pos)
+    cell, unique, inverse, width = cells(pos, size)
+    order = np.argsort(inverse, kind="stable")
+    counts = np.bincount(inverse)
+    starts = np.cumsum(counts) - counts
+    keys = unique[inverse]
+    find = finder(unique, width)
+    disp = np.zeros((n, 2))
+    nodes = np.arange(n)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            at, found = find(keys + dx * width + dy)
+            i = nodes[found]
+            count = counts[at[found]]
+            # Each node i with each node of the other cell
+            first = np.repeat(starts[at[found]] - (np.cumsum(count) - count), count)
+            j = order[first + np.arange(count.sum())]
+            i = np.repeat(i, count)
+            delta = pos[i] - pos[j]
+            dist2 = np.maximum(delta[:, 0] ** 2 + delta[:, 1] ** 2, (0.01 * k) ** 2)
+            push = np.where(i != j, k * k / dist2, 0.0)
+            for axis in (0, 1):
+                disp[:, axis] += np.bincount(i, weights=delta[:, axis] * push, minlength=n)
+    return disp
@@ -0,0 +1,128 @@
+import numpy as np
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.figure import Figure
+
+import GraphLayout
+
+# Above these sizes the arrow heads and the labels are not all drawn, they would cover the whole picture
+ARROW_LIMIT = 5000
+LABEL_LIMIT = 200
+# Up to this number of nodes all of them are labeled
+LABEL_ALL = 100
+
+
+def layout(graph, csr, seed: int = None):
+    """
+    Returns the positions to draw the nodes at: the nodes that have a position stay there, and the others are
+    placed by a force directed layout (see GraphLayout), the graph is not changed.
+    @:return n*2 array of the x, y of the nodes in the order of the snapshot
+    """
+    xy = GraphLayout.node_positions(graph, csr)
+    known = ~np.isnan(xy).any(axis=1)
+    if known.all():
+        return xy
+    return GraphLayout.fruchterman_reingold(csr, xy, fixed=True, seed=seed)
+
+
+def label_nodes(xy, degree, cells: int, limit: int):
+    """
+    Chooses the nodes to label: the picture is split to cells x cells squares, and only the node of the highest
+    degree in each square is labeled, so the labels do not cover each other.
+    @:return dense indices of at most limit nodes
+    """
+    low = xy.min(axis=0)
+    size = np.maximum(xy.max(axis=0) - low, 1e-12)
+    cell = np.minimum((xy - low) / size * cells, cells - 1).astype(np.int64)
+    cellIds = cell[:, 0] * cells + cell[:, 1]
+    byDegree = np.argsort(-degree, kind="stable")
+    # np.unique returns the first place of each cell, the node of the highest degree in it
+    first = np.unique(cellIds[byDegree], return_index=True)[1]
+    chosen = byDegree[np.sort(first)]
+    return chosen[:limit]
+
+
+def draw(ax, graph, xy=None, labels=None, arrows=None):
+    """
+    Draws the graph on a matplotlib axes, with a fixed number of artists whatever the size of the graph:
+    one LineCollection of all the edges, one PolyCollection of all the arrow heads, one scatter of all the nodes,
+    and a label for each labeled node.
+    @:param ax: the axes
+    @:param graph: the graph (DiGraph)
+    @:param xy: n*2 array of the positions of the nodes in the order of graph.freeze(), None to use the
+    positions of the nodes and a layout for the nodes without one
+    @:param labels: True to label all the nodes, False for none, None to label all the nodes of a small graph,
+    and on a larger graph only the nodes of the highest degree that have room for a label
+    @:param arrows: True or False to draw the arrow heads or not, None to draw them up to ARROW_LIMIT edges
+    """
+    csr = graph.freeze()
+    n = csr.v_size()
+    if xy is None:
+        xy = layout(graph, csr)
+    indptr = np.frombuffer(csr.out_indptr, dtype=np.int64)
+    dest = np.frombuffer(csr.out_indices, dtype=np.int32)
+    src = np.repeat(np.arange(n), np.diff(indptr))
+    m = len(dest)
+    # Thinner lines and smaller nodes as the graph grows
+    width = 1.0 if m <= 1000 else 0.5 if m <= ARROW_LIMIT else 0.2
+    alpha = 1.0 if m <= 1000 else 0.3
+    if m:
+        start = xy[src]
+        end = xy[dest]
+        ax.add_collection(LineCollection(np.stack((start, end), axis=1), colors="k", linewidths=width,
+                                         alpha=alpha, zorder=1))
+        if arrows or (arrows is None and m <= ARROW_LIMIT):
+            # A triangle at the end of each edge, its size is relative to the picture and to the edge
+            vector = end - start
+            length = np.hypot(vector[:, 0], vector[:, 1])
+            unit = vector / np.maximum(length, 1e-12)[:, None]
+            extent = np.hypot(*(xy.max(axis=0) - xy.min(axis=0))) or 1.0
+            head = np.minimum(0.012 * extent, 0.3 * length)[:, None]
+            normal = unit[:, ::-1] * (1, -1)
+            base = end - unit * head
+            heads = np.stack((end, base + normal * head * 0.3, base - normal * head * 0.3), axis=1)
+            ax.add_collection(PolyCollection(heads, facecolors="k", edgecolors="none", alpha=alpha,
+                                             zorder=2))
+    ax.scatter(xy[:, 0], xy[:, 1], s=20 if n <= 1000 else 2, c="b", zorder=3)
+    if labels or (labels is None and n):
+        if labels or n <= LABEL_ALL:
+            chosen = range(n)
+        else:
+            degree = np.diff(indptr) + np.diff(np.frombuffer(csr.in_indptr, dtype=np.int64))
+            # A square about the size of a label
+            cells = max(1, int(min(ax.bbox.width, ax.bbox.height) / 40))
+            chosen = label_nodes(xy, degree, cells, LABEL_LIMIT)
+        for i in chosen:
+            ax.annotate(csr.ids[i], (xy[i, 0], xy[i, 1]), color='red')
+    ax.autoscale_view()
+    ax.set_xlabel('x - axis')
+    ax.set_ylabel('y - axis')
+    ax.set_title("Graph Plot")
+
+
+def plot_graph(graph, file_name: str = None, labels=None, arrows=None, size: tuple = (8, 6), dpi: int = 100):
+    """
+    Plots a graph, GraphAlgo.plot_graph imports this module on its first call, so matplotlib is only
+    loaded by the programs that plot.
+    If the nodes have a position, the nodes will be placed there.
+    Otherwise, they will be placed by a force directed layout, and their positions are not written to the graph.
+    With a file name the picture is drawn by the Agg (or SVG) backend of matplotlib directly and written to the
+    file, no display is needed; pyplot, which looks for a display, is only imported to show the picture.
+    @:param graph: the graph (DiGraph)
+    @:param file_name: the path of the picture, its format is by the extension (.png, .svg, .pdf),
+    None to show the picture in a window
+    @:param labels: see draw
+    @:param arrows: see draw
+    @:param size: the size of the picture in inches
+    @:param dpi: the dots per inch of the picture
+    @:return None
+    """
+    if file_name is not None:
+        fig = Figure(figsize=size, dpi=dpi)
+        draw(fig.add_subplot(), graph, labels=labels, arrows=arrows)
+        fig.savefig(file_name)
+        return
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=size, dpi=dpi)
+    draw(ax, graph, labels=labels, arrows=arrows)
+    plt.show()
+    plt.close(fig)
@@ -0,0 +1,113 @@
+import json
+
+# The characters that can go on a number, after the part of it that was decoded
+NUMBER_CHARS = "0123456789.eE+-"
+
+
+class JsonStream:
+    """
+    This class reads a JSON object from a file piece by piece.
+    Only a small buffer of the file is kept in memory: the members of the object are decoded one at a time,
+    and the arrays of chosen members are decoded element by element,
+    so a huge array is never built as a whole.
+    """
+
+    def __init__(self, file, chunk_size: int = 1 << 16):
+        """
+        Initialize the stream.
+        @:param file: a file opened for reading in text mode
+        @:param chunk_size: the number of characters to read from the file each time
+        """
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def items(self, array_keys=()):
+        """
+        Yields the members of the JSON object in the file as pairs of (key, value).
+        For a key in array_keys whose value is an array, a pair of (key, element) is yielded
+        for each element of the array instead.
+        @:param array_keys: keys of the members to read element by element
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise ValueError("Expecting a key of the JSON object")
+            self._expect(":")
+            if key in array_keys and self._peek() == "[":
+                self.pos += 1
+                if self._peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield key, self._value()
+                        if self._next_of(",]") == "]":
+                            break
+            else:
+                yield key, self._value()
+            if self._next_of(",}") == "}":
+                return
+
+    def _fill(self):
+        """Reads the next piece of the file into the buffer, returns False at the end of the file"""
+        if self.eof:
+            return False
+        # Read at least as much as we already hold, so a long value is not decoded again too many times
+        chunk = self.file.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _peek(self):
+        """Skips white spaces and returns the next character without reading it, an empty string at the end"""
+        while True:
+            buf = self.buf
+            pos = self.pos
+            while pos < len(buf) and buf[pos] in " \t\n\r":
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str):
+        """Reads the next character, it must be char"""
+        if self._peek() != char:
+            raise ValueError(f"Expecting '{char}' at character {self.pos}")
+        self.pos += 1
+
+    def _next_of(self, chars: str):
+        """Reads the next character, it must be one of chars"""
+        char = self._peek()
+        if char == "" or char not in chars:
+            raise ValueError(f"Expecting one of '{chars}' at character {self.pos}")
+        self.pos += 1
+        return char
+
+    def _value(self):
+        """Decodes the next JSON value"""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the buffer, or cut after "1." or "2e", may go on in the next piece
+                # of the file
+                number = isinstance(value, (int, float)) and not isinstance(value, bool)
+                if self.eof or not number or end < len(self.buf) and self.buf[end] not in NUMBER_CHARS:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
@@ -0,0 +1,145 @@
+import struct
+import zlib
+from array import array
+from math import inf
+
+MAGIC = b"ALT1"
+HEADER = struct.Struct("<4sIqqI4x")
+
+
+class LandmarkIndex:
+    """
+    This class represents an ALT (A*, landmarks and triangle inequality) index of a graph.
+    For each of k landmark nodes L it keeps the distances from L to every node and from every node to L.
+    By the triangle inequality, for any nodes v and t:
+        d(v, t) >= d(L, t) - d(L, v)   and   d(v, t) >= d(v, L) - d(t, L)
+    so the largest of these differences is a lower bound of d(v, t), and A* directed by it scans
+    far fewer nodes than Dijkstra.
+    The index belongs to one CSR snapshot of the graph, after a change of the graph it can not be used.
+    """
+
+    def __init__(self, csr, landmarks, dist_from, dist_to):
+        """
+        Initialize the index.
+        @:param csr: the snapshot of the graph the distances were computed on
+        @:param landmarks: dense indices of the landmarks
+        @:param dist_from: for each landmark, array('d') of its distance to each node (inf if there is no path)
+        @:param dist_to: for each landmark, array('d') of the distance of each node to it
+        """
+        self.csr = csr
+        self.landmarks = landmarks
+        self.dist_from = dist_from
+        self.dist_to = dist_to
+
+    @staticmethod
+    def build(csr, k: int, strategy: str = "farthest"):
+        """
+        Chooses k landmarks and computes their distances.
+        @:param csr: the snapshot of the graph
+        @:param k: the number of landmarks
+        @:param strategy: "farthest" - each landmark is the node farthest from the landmarks chosen before it
+        (a node no landmark is connected to first), the first is the node of the highest degree;
+        "degree" - the k nodes of the highest degree
+        @:return LandmarkIndex
+        """
+        n = csr.v_size()
+        k = min(k, n)
+        degree = [csr.out_indptr[i + 1] - csr.out_indptr[i] + csr.in_indptr[i + 1] - csr.in_indptr[i]
+                  for i in range(n)]
+        byDegree = sorted(range(n), key=lambda i: -degree[i])
+        if strategy not in ("farthest", "degree"):
+            raise ValueError(f"Unknown landmark strategy: {strategy}")
+        landmarks = []
+        dist_from = []
+        dist_to = []
+        # The distance of each node from the closest landmark, in any direction
+        closest = array('d', [inf]) * n
+        for j in range(k):
+            if strategy == "degree" or j == 0:
+                candidate = byDegree[j]
+            else:
+                candidate = max(range(n), key=closest.__getitem__)
+            landmarks.append(candidate)
+            rows = []
+            for reverse in (False, True):
+                row = array('d', [inf]) * n
+                for i, weight in csr.dijkstra(candidate, reverse=reverse)[0].items():
+                    row[i] = weight
+                    if weight < closest[i]:
+                        closest[i] = weight
+                rows.append(row)
+            dist_from.append(rows[0])
+            dist_to.append(rows[1])
+            # A landmark is never chosen again
+            closest[candidate] = -1
+        return LandmarkIndex(csr, landmarks, dist_from, dist_to)
+
+    def heuristic(self, target: int):
+        """
+        Returns the lower bounds of the distances to target, by all the landmarks.
+        @:param target: dense index of the target node
+        @:return function from a dense index to a lower bound of the distance of its path to target
+        """
+        bounds = [(row_from, row_from[target], row_to, row_to[target])
+                  for row_from, row_to in zip(self.dist_from, self.dist_to)]
+
+        def heuristic(v: int):
+            best = 0
+            for row_from, from_target, row_to, to_target in bounds:
+                # d(v, t) >= d(L, t) - d(L, v), inf if L reaches v but not t
+                if row_from[v] != inf and from_target - row_from[v] > best:
+                    best = from_target - row_from[v]
+                # d(v, t) >= d(v, L) - d(t, L), inf if t reaches L but v does not
+                if to_target != inf and row_to[v] - to_target > best:
+                    best = row_to[v] - to_target
+            # Leave a margin for the rounding of the floats
+            return best * (1 - 1e-9)
+
+        return heuristic
+
+    @staticmethod
+    def checksum(csr):
+        """Returns a checksum of the nodes and the edges of a snapshot, to match an index file with its graph"""
+        crc = 0
+        for values in (array('q', csr.ids), csr.out_indptr, csr.out_indices, csr.out_weights):
+            crc = zlib.crc32(memoryview(values).cast('B'), crc)
+        return crc
+
+    def save(self, file_name: str):
+        """
+        Writes the index to a file: a header, the landmarks and the rows of distances.
+        @:param file_name: the path to the out file
+        """
+        csr = self.csr
+        with open(file_name, "wb") as file:
+            file.write(HEADER.pack(MAGIC, len(self.landmarks), csr.v_size(), csr.e_size(),
+                                   LandmarkIndex.checksum(csr)))
+            file.write(array('q', self.landmarks).tobytes())
+            for row in self.dist_from + self.dist_to:
+                file.write(row.tobytes())
+
+    @staticmethod
+    def load(file_name: str, csr):
+        """
+        Reads an index file of the graph of a snapshot.
+        @:param file_name: the path to the file
+        @:param csr: the current snapshot of the graph
+        @:return LandmarkIndex
+        """
+        with open(file_name, "rb") as file:
+            data = file.read()
+        magic, k, n, m, crc = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{file_name} is not a landmark index file")
+        if n != csr.v_size() or m != csr.e_size() or crc != LandmarkIndex.checksum(csr):
+            raise ValueError(f"{file_name} is an index of a different graph")
+        offset = HEADER.size
+        landmarks = array('q', data[offset:offset + 8 * k]).tolist()
+        offset += 8 * k
+        rows = []
+        for _ in range(2 * k):
+            rows.append(array('d', data[offset:offset + 8 * n]))
+            offset += 8 * n
+        if offset != len(data):
+            raise ValueError(f"{file_name} has a wrong size")
+        return LandmarkIndex(csr, landmarks, rows[:k], rows[k:])
@@ -0,0 +1,236 @@
+from array import array
+from collections.abc import Mapping
+from math import isnan, nan
+
+
+class NodeStore(Mapping):
+    """
+    This class keeps the nodes of a graph in columns instead of an object for each node: parallel arrays of
+    the keys, the x, y, z of the positions (NaN for a node without position, z is NaN for a position of 2 values),
+    the tags and the weights, and a dictionary from a key to its row. The infos are kept only for the nodes whose
+    info is not the default " ".
+    A node with a position costs about 150 bytes, instead of about 260 for a DiGraph.nodeData object, its position
+    tuple and floats (300 before nodeData had __slots__).
+    The store is a read only mapping from a key to a NodeView, a light object made on each access that reads
+    and writes the row of its node, like DiGraph.nodeData does. The nodes keep the order they were added in:
+    a removed node leaves an empty row, and the rows are packed again when half of them are empty.
+    """
+
+    def __init__(self):
+        """Initialize an empty store"""
+        self.rows = {}  # key -> row
+        self.ids = array('q')
+        self.x = array('d')
+        self.y = array('d')
+        self.z = array('d')
+        self.tags = array('q')
+        self.weights = array('d')
+        self.alive = bytearray()
+        self.infos = {}  # key -> info, only the infos that are not " "
+
+    def add(self, key: int, pos: tuple = None):
+        """Adds a node in a new row, the key must not be in the store"""
+        self.rows[key] = len(self.ids)
+        self.ids.append(key)
+        if pos is None:
+            self.x.append(nan)
+            self.y.append(nan)
+            self.z.append(nan)
+        else:
+            self.x.append(pos[0])
+            self.y.append(pos[1])
+            self.z.append(pos[2] if len(pos) > 2 else nan)
+        self.tags.append(0)
+        self.weights.append(0)
+        self.alive.append(1)
+
+    def remove(self, key: int):
+        """Removes a node, its row is left empty until the rows are packed"""
+        row = self.rows.pop(key)
+        self.alive[row] = 0
+        self.infos.pop(key, None)
+        if 2 * len(self.rows) < len(self.ids):
+            self.pack()
+
+    def pack(self):
+        """Moves the nodes to the first rows, in their order, and drops the empty rows"""
+        alive = self.alive
+        for name in ("ids", "x", "y", "z", "tags", "weights"):
+            column = getattr(self, name)
+            setattr(self, name, array(column.typecode, (value for value, live in zip(column, alive) if live)))
+        self.alive = bytearray(b"\x01") * len(self.ids)
+        self.rows = {key: row for row, key in enumerate(self.ids)}
+
+    def copy(self):
+        """Returns a store with copies of the columns, like dict.copy (see DiGraph.snapshot)"""
+        store = NodeStore.__new__(NodeStore)
+        store.rows = dict(self.rows)
+        for name in ("ids", "x", "y", "z", "tags", "weights"):
+            setattr(store, name, getattr(self, name)[:])
+        store.alive = bytearray(self.alive)
+        store.infos = dict(self.infos)
+        return store
+
+    @staticmethod
+    def mapped(ids, pos, rows: dict):
+        """
+        Returns a store on the arrays of a CSR snapshot (see CSRGraph): the keys and the positions are views of
+        the arrays, not copies, so the positions are read only if the arrays are of a memory mapped file.
+        @:param ids: the keys of the nodes, in their order
+        @:param pos: flat array of x, y, z of each node (NaN for a missing value) or None
+        @:param rows: dictionary from the key of each node to its row (the dense index of the snapshot)
+        @:return NodeStore of the nodes
+        """
+        n = len(ids)
+        store = NodeStore.__new__(NodeStore)
+        store.rows = rows
+        store.ids = ids
+        if pos is None:
+            store.x, store.y, store.z = (array('d', [nan]) * n for _ in range(3))
+        else:
+            store.x, store.y, store.z = pos[0::3], pos[1::3], pos[2::3]
+        store.tags = array('q', bytes(8 * n))
+        store.weights = array('d', bytes(8 * n))
+        store.alive = bytearray(b"\x01") * n
+        store.infos = {}
+        return store
+
+    def positions(self):
+        """
+        Returns the positions of all the nodes, in their order.
+        @:return flat array('d') of x, y, z of each node (NaN for a missing value), True if any node has a position
+        """
+        pos = array('d')
+        hasPos = False
+        x, y, z = self.x, self.y, self.z
+        for row in self.rows.values():
+            pos.append(x[row])
+            pos.append(y[row])
+            pos.append(z[row])
+            if not hasPos and not isnan(x[row]):
+                hasPos = True
+        return pos, hasPos
+
+    def __getitem__(self, key):
+        if key not in self.rows:
+            raise KeyError(key)
+        return NodeView(self, key)
+
+    def get(self, key, default=None):
+        """Returns the view of a node, default if it is not in the store"""
+        return NodeView(self, key) if key in self.rows else default
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+
+class NodeView:
+    """
+    A node of a NodeStore, it has the methods of DiGraph.nodeData and reads and writes the columns of the store.
+    A view is made on each access, do not keep it after its node is removed.
+    """
+
+    __slots__ = ("store", "key")
+
+    def __init__(self, store: NodeStore, key: int):
+        self.store = store
+        self.key = key
+
+    @property
+    def pos(self):
+        store = self.store
+        row = store.rows[self.key]
+        x = store.x[row]
+        if isnan(x):
+            return None
+        z = store.z[row]
+        return (x, store.y[row]) if isnan(z) else (x, store.y[row], z)
+
+    @pos.setter
+    def pos(self, pos: tuple):
+        store = self.store
+        row = store.rows[self.key]
+        if pos is None:
+            store.x[row] = store.y[row] = store.z[row] = nan
+        else:
+            store.x[row] = pos[0]
+            store.y[row] = pos[1]
+            store.z[row] = pos[2] if len(pos) > 2 else nan
+
+    @property
+    def tag(self):
+        store = self.store
+        return store.tags[store.rows[self.key]]
+
+    @tag.setter
+    def tag(self, tag: int):
+        store = self.store
+        store.tags[store.rows[self.key]] = tag
+
+    @property
+    def weight(self):
+        store = self.store
+        return store.weights[store.rows[self.key]]
+
+    @weight.setter
+    def weight(self, weight: float):
+        store = self.store
+        store.weights[store.rows[self.key]] = weight
+
+    @property
+    def info(self):
+        return self.store.infos.get(self.key, " ")
+
+    @info.setter
+    def info(self, info: str):
+        if info == " ":
+            self.store.infos.pop(self.key, None)
+        else:
+            self.store.infos[self.key] = info
+
+    def getKey(self):
+        return self.key
+
+    def getInfo(self):
+        return self.info
+
+    def setInfo(self, info: str):
+        self.info = info
+
+    def getTag(self):
+        return self.tag
+
+    def setTag(self, tag: int):
+        self.tag = tag
+
+    def getPos(self):
+        return self.pos
+
+    def setPos(self, pos: tuple):
+        self.pos = pos
+
+    def getWeight(self):
+        return self.weight
+
+    def setWeight(self, weight: float):
+        self.weight = weight
+
+    def __eq__(self, other):
+        """Two nodes are equal if they have the same key, also a view and a DiGraph.nodeData"""
+        if hasattr(other, "getKey"):
+            return self.key == other.getKey()
+        return NotImplemented
+
+    def __str__(self) -> str:
+        return f"key:{self.key}, pos:{self.pos}, tag:{self.tag}, info:{self.info}"
+
+    __repr__ = __str__
@@ -0,0 +1,78 @@
+import os
+from array import array
+from collections import deque
+from math import inf
+
+# The snapshot of the graph in a worker process, it is sent once when the worker starts
+_csr = None
+
+
+def _init_worker(csr):
+    """Keeps the snapshot of the graph in the worker process"""
+    global _csr
+    _csr = csr
+
+
+def _rows(sources, targets):
+    """Runs the rows of a part of the sources in the worker process"""
+    return distance_rows(_csr, sources, targets)
+
+
+def distance_rows(csr, sources, targets=None):
+    """
+    Returns the distances from each source to the targets, one Dijkstra run for each source.
+    @:param csr: the snapshot of the graph
+    @:param sources: dense indices of the src nodes, None for a node that is not in the graph
+    @:param targets: dense indices of the targets (None for a node that is not in the graph), None for all the nodes
+    @:return list of array('d') rows, inf where there is no path
+    """
+    n = csr.v_size()
+    rows = []
+    for src in sources:
+        dist = {} if src is None else csr.dijkstra(src)[0]
+        if targets is None:
+            row = array('d', [inf]) * n
+            for i, weight in dist.items():
+                row[i] = weight
+        else:
+            row = array('d', [dist.get(t, inf) for t in targets])
+        rows.append(row)
+    return rows
+
+
+def iter_rows(csr, sources, targets=None, workers: int = None, chunk_size: int = 16):
+    """
+    Yields the distance rows of the sources, in the order of the sources.
+    The sources are split to parts of chunk_size and the parts run on a pool of processes,
+    the snapshot of the graph is sent to each process once.
+    @:param csr: the snapshot of the graph
+    @:param sources: dense indices of the src nodes
+    @:param targets: dense indices of the targets, None for all the nodes
+    @:param workers: the number of processes, None for the number of CPUs, 1 to run in this process
+    @:param chunk_size: the number of sources in each part
+    """
+    sources = list(sources)
+    chunks = [sources[i:i + chunk_size] for i in range(0, len(sources), chunk_size)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        for chunk in chunks:
+            yield from distance_rows(csr, chunk, targets)
+        return
+    # The pool is imported only when it is used, it loads multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(csr,)) as executor:
+        # Keep a few parts running ahead of the reader, and no more
+        pending = deque()
+        chunks = iter(chunks)
+        for chunk in chunks:
+            pending.append(executor.submit(_rows, chunk, targets))
+            if len(pending) == 2 * workers:
+                break
+        while pending:
+            rows = pending.popleft().result()
+            chunk = next(chunks, None)
+            if chunk is not None:
+                pending.append(executor.submit(_rows, chunk, targets))
+            yield from rows
@@ -0,0 +1,77 @@
+import sys
+from collections import OrderedDict
+from threading import Lock
+
+
+class PathCache:
+    """
+    This class keeps the shortest path trees (distances and parents) of the last src nodes that were asked for,
+    so any later path from the same src node only has to be read from the tree.
+    The trees belong to one CSR snapshot of the graph: when the MC of the graph changes the graph gives a new
+    snapshot and all the trees are dropped.
+    The least recently used trees are evicted when there are more than max_entries trees,
+    or when their estimated size is more than max_bytes.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = None):
+        """Initialize an empty cache and its counters"""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.trees = OrderedDict()  # dense index of the src node -> (distances, parents, size)
+        self.csr = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = Lock()
+
+    def get(self, csr, src: int):
+        """
+        Returns the shortest path tree of a src node, runs Dijkstra only if it is not in the cache.
+        @:param csr: the current snapshot of the graph
+        @:param src: dense index of the src node
+        @:return dictionary of the distance of each node, dictionary of the parent of each node
+        """
+        with self.lock:
+            if not csr.same_content(self.csr):
+                # The graph was changed since the trees were computed
+                self.trees.clear()
+                self.bytes = 0
+                self.csr = csr
+            tree = self.trees.get(src)
+            if tree is not None:
+                self.hits += 1
+                self.trees.move_to_end(src)
+                return tree[0], tree[1]
+            self.misses += 1
+        dist, parents = csr.dijkstra(src)
+        # The dictionaries and a float object for each distance
+        size = sys.getsizeof(dist) + sys.getsizeof(parents) + 24 * len(dist)
+        with self.lock:
+            if csr.same_content(self.csr) and src not in self.trees:
+                self.trees[src] = (dist, parents, size)
+                self.bytes += size
+                self.evict()
+        return dist, parents
+
+    def evict(self):
+        """Removes the least recently used trees until the cache is within its bounds"""
+        while self.trees and (len(self.trees) > self.max_entries or
+                              self.max_bytes is not None and self.bytes > self.max_bytes):
+            self.bytes -= self.trees.popitem(last=False)[1][2]
+            self.evictions += 1
+
+    def clear(self):
+        """Removes all the trees from the cache"""
+        with self.lock:
+            self.trees.clear()
+            self.bytes = 0
+            self.csr = None
+
+    def stats(self):
+        """
+        Returns the counters of the cache
+        @:return dictionary of hits, misses, evictions, entries and bytes
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.trees), "bytes": self.bytes}
@@ -0,0 +1,235 @@
+import random
+from array import array
+from bisect import bisect_right
+
+
+class ReachabilityIndex:
+    """
+    This class answers "can node u reach node v" without scanning the graph.
+    The nodes of each Strongly Connected Component(SCC) reach each other, so the index is built on the
+    condensation of the graph: a DAG with a node for each component. Tarjan's algorithm numbers a component after
+    all the components it reaches, so a component never reaches a component with a higher number.
+    The components are also numbered in the post order of a DFS on the condensation: the components a DFS call
+    finished are exactly a range of numbers [first, post] that the component reaches through the DFS tree.
+    The label of a component is the union of its own range and the labels of its successors,
+    kept as a sorted list of disjoint intervals (a tree cover), so u reaches v if the post number of the component
+    of v is in one of the intervals of the component of u, found by a binary search.
+    On some DAGs (many paths that cross each other) the labels grow towards the square of the number of components,
+    then the index keeps instead a few random DFS orders with one interval for each component (GRAIL):
+    a range [low, post] that holds the ranges of all the components it reaches, so a component whose range does not
+    hold the range of v can not reach v, and the DFS tree range [first, post] of the component says it does.
+    Only when none of them decides, the condensation is searched, and the components the ranges rule out are skipped.
+    The index belongs to one CSR snapshot of the graph, after a change of the graph it can not be used.
+    """
+
+    # The number of random DFS orders kept when the labels are too big
+    ORDERS = 3
+
+    def __init__(self, csr, comp, successors, labels, orders):
+        """
+        Initialize the index.
+        @:param csr: the snapshot of the graph the index was built on
+        @:param comp: the number of the component of each node (dense index)
+        @:param successors: (indptr, indices) of the edges of the condensation
+        @:param labels: (post, indptr, starts, ends): the post order number of each component, the intervals of
+        component c are starts[indptr[c]:indptr[c + 1]] and ends[...]. None if the labels were too big
+        @:param orders: list of (first, low, post) of each random DFS order, used when labels is None
+        """
+        self.csr = csr
+        self.comp = comp
+        self.successors = successors
+        self.labels = labels
+        self.orders = orders
+
+    @staticmethod
+    def build(csr, label_limit: int = 16, seed: int = 0):
+        """
+        Finds the components, the condensation and the labels, in O(V+E) plus the size of the labels.
+        @:param csr: the snapshot of the graph
+        @:param label_limit: the average number of intervals for each component the labels may have,
+        above it random DFS orders are kept instead
+        @:param seed: the seed of the random DFS orders
+        @:return ReachabilityIndex
+        """
+        n = csr.v_size()
+        comp = array('i', [0]) * n
+        count = 0
+        for component in csr.scc():
+            for i in component:
+                comp[i] = count
+            count += 1
+        # The edges between the components
+        successors = [set() for _ in range(count)]
+        indptr, indices = csr.out_indptr, csr.out_indices
+        for u in range(n):
+            cu = comp[u]
+            for e in range(indptr[u], indptr[u + 1]):
+                cv = comp[indices[e]]
+                if cv != cu:
+                    successors[cu].add(cv)
+        offsets = array('q', [0])
+        targets = array('i')
+        for s in successors:
+            targets.extend(sorted(s))
+            offsets.append(len(targets))
+        successors = (offsets, targets)
+
+        first, low, post = ReachabilityIndex.dfs(successors, count, None)
+        labels = ReachabilityIndex.tree_cover(successors, first, post, label_limit * count)
+        orders = []
+        if labels is None:
+            rand = random.Random(seed)
+            orders = [(first, low, post)]
+            orders += [ReachabilityIndex.dfs(successors, count, rand) for _ in range(ReachabilityIndex.ORDERS - 1)]
+        return ReachabilityIndex(csr, comp, successors, labels, orders)
+
+    @staticmethod
+    def dfs(successors, count: int, rand):
+        """
+        Iterative DFS on the condensation, from the components no other component reaches first.
+        @:param rand: random generator to shuffle the order of the roots and of the successors, None for no shuffle
+        @:return arrays of the first post number in the DFS tree of each component, the lowest post number
+        of all the components it reaches, and its post number
+        """
+        offsets, targets = successors
+        post = array('i', [-1]) * count
+        first = array('i', [0]) * count
+        low = array('i', [0]) * count
+        roots = list(range(count - 1, -1, -1))
+        if rand is not None:
+            rand.shuffle(roots)
+
+        def children(c):
+            part = targets[offsets[c]:offsets[c + 1]]
+            if rand is not None:
+                part = list(part)
+                rand.shuffle(part)
+            return iter(part)
+
+        counter = 0
+        for root in roots:
+            if post[root] != -1:
+                continue
+            post[root] = -2  # discovered
+            first[root] = counter
+            work = [(root, children(root))]
+            while work:
+                c, edges = work[-1]
+                for d in edges:
+                    if post[d] == -1:
+                        post[d] = -2
+                        first[d] = counter
+                        work.append((d, children(d)))
+                        break
+                else:
+                    work.pop()
+                    post[c] = counter
+                    counter += 1
+                    lowest = first[c]
+                    for e in range(offsets[c], offsets[c + 1]):
+                        if low[targets[e]] < lowest:
+                            lowest = low[targets[e]]
+                    low[c] = lowest
+        return first, low, post
+
+    @staticmethod
+    def tree_cover(successors, first, post, limit: int):
+        """
+        Computes the labels of the components, the successors of a component are finished before it.
+        @:return (post, indptr, starts, ends), None if the labels have more than limit intervals
+        """
+        offsets, targets = successors
+        count = len(post)
+        labels = [None] * count
+        total = 0
+        for c in sorted(range(count), key=post.__getitem__):
+            intervals = [(first[c], post[c])]
+            for e in range(offsets[c], offsets[c + 1]):
+                intervals += labels[targets[e]]
+            intervals.sort()
+            merged = [intervals[0]]
+            for start, end in intervals[1:]:
+                lastStart, lastEnd = merged[-1]
+                if start <= lastEnd + 1:
+                    if end > lastEnd:
+                        merged[-1] = (lastStart, end)
+                else:
+                    merged.append((start, end))
+            labels[c] = merged
+            total += len(merged)
+            if total > limit:
+                return None
+        indptr = array('q', [0])
+        starts = array('i')
+        ends = array('i')
+        for c in range(count):
+            for start, end in labels[c]:
+                starts.append(start)
+                ends.append(end)
+            indptr.append(len(starts))
+        return post, indptr, starts, ends
+
+    def reachable(self, src: int, target: int):
+        """
+        Checks if there is a path from src to target.
+        @:param src: dense index of the src node
+        @:param target: dense index of the target node
+        @:return True if target can be reached from src, False o.w.
+        """
+        c = self.comp[src]
+        d = self.comp[target]
+        if c == d:
+            return True
+        # A component is numbered after all the components it reaches
+        if d > c:
+            return False
+        if self.labels is not None:
+            post, indptr, starts, ends = self.labels
+            p = post[d]
+            start = indptr[c]
+            # The last interval that starts at or before p
+            i = bisect_right(starts, p, start, indptr[c + 1]) - 1
+            return i >= start and ends[i] >= p
+        decided = self.decide(c, d)
+        if decided is not None:
+            return decided
+        # Search the condensation, only through components that may reach d
+        offsets, targets = self.successors
+        seen = {c}
+        stack = [c]
+        while stack:
+            x = stack.pop()
+            for e in range(offsets[x], offsets[x + 1]):
+                y = targets[e]
+                if y in seen or y < d:
+                    continue
+                decided = self.decide(y, d)
+                if decided:
+                    return True
+                seen.add(y)
+                if decided is None:
+                    stack.append(y)
+        return False
+
+    def decide(self, c: int, d: int):
+        """
+        Checks by the random DFS orders if component c reaches component d.
+        @:return True or False, None if the orders do not decide
+        """
+        if c == d:
+            return True
+        for first, low, post in self.orders:
+            if low[d] < low[c] or post[d] > post[c]:
+                return False
+        for first, low, post in self.orders:
+            if first[c] <= post[d] <= post[c]:
+                return True
+        return None
+
+    def components(self):
+        """Returns the number of components, the nodes of the condensation"""
+        return len(self.successors[0]) - 1
+
+    def intervals(self):
+        """Returns the number of intervals in the labels, None if the index keeps random DFS orders instead"""
+        return None if self.labels is None else len(self.labels[2])